@@ -21,6 +21,8 @@ from app.workflows import (
     run_workflow,
     run_chat_workflow,
     run_planner,
+    upload_image_ref,
+    prepare_image_input,
     WorkflowInput
 )
 
@@ -3,15 +3,9 @@ Formatter Agents - Agents that format and normalize outputs from other agents
 """
 from typing import Dict, Any, List, Literal
 from pydantic import BaseModel, ConfigDict, Field
-from pathlib import Path
 
 # Load environment variables
-from dotenv import load_dotenv
-env_path = Path(__file__).parent.parent.parent / ".env"
-if env_path.exists():
-    load_dotenv(dotenv_path=env_path)
-else:
-    load_dotenv(override=False)
+from app import config  # noqa: F401
 
 from agents import Agent, ModelSettings, AgentOutputSchema
 
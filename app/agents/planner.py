@@ -3,15 +3,9 @@ Planner Agent - Generates mission task plans for autonomous drones
 """
 from typing import List, Literal, Optional
 from pydantic import BaseModel, ConfigDict, Field
-from pathlib import Path
 
 # Load environment variables
-from dotenv import load_dotenv
-env_path = Path(__file__).parent.parent.parent / ".env"
-if env_path.exists():
-    load_dotenv(dotenv_path=env_path)
-else:
-    load_dotenv(override=False)
+from app import config  # noqa: F401
 
 from agents import Agent, ModelSettings, AgentOutputSchema
 
@@ -40,6 +34,61 @@ class PlannerSchema(BaseModel):
     tasks: List[PlannerSchema__TasksItem]
 
 
+def apply_task_rules(plan: PlannerSchema, fusion_status: Optional[str] = None) -> PlannerSchema:
+    """Enforce the deterministic task rules on a planner output.
+
+    The planner agent only picks the target location; the follow-up task type,
+    altitudes, durations and speeds are fixed here:
+    - MOVE_TO: alt_agl_ft = max(alt_agl_ft, 60), duration_s = 0, speed_mps = 3.0
+    - VISION_WAYPOINT (fusion_status "safe"): same altitude, duration_s = 60, speed_mps = 0.5
+    - LOITER (fusion_status "nosafe"): altitude + 20, duration_s = 90, speed_mps = 0
+    
+    Args:
+        plan: Planner output as returned by the agent (error-mode plans have no tasks)
+        fusion_status: The input waypoint's fusion_status, if any ("nosafe" in any case
+            → LOITER, anything else → VISION_WAYPOINT)
+    
+    Returns:
+        The same plan with exactly two normalized tasks (unchanged if it has no tasks)
+    """
+    if not plan.tasks:
+        return plan
+    
+    target = plan.tasks[0]
+    alt_agl_ft = max(target.alt_agl_ft, 60)
+    
+    move_to = PlannerSchema__TasksItem(
+        type="MOVE_TO",
+        lat=target.lat,
+        lon=target.lon,
+        alt_agl_ft=alt_agl_ft,
+        duration_s=0,
+        speed_mps=3.0
+    )
+    # fusion_status is a free-form client string: "NoSafe " is still nosafe
+    if (fusion_status or "").strip().lower() == "nosafe":
+        follow_up = PlannerSchema__TasksItem(
+            type="LOITER",
+            lat=target.lat,
+            lon=target.lon,
+            alt_agl_ft=alt_agl_ft + 20,
+            duration_s=90,
+            speed_mps=0
+        )
+    else:
+        follow_up = PlannerSchema__TasksItem(
+            type="VISION_WAYPOINT",
+            lat=target.lat,
+            lon=target.lon,
+            alt_agl_ft=alt_agl_ft,
+            duration_s=60,
+            speed_mps=0.5
+        )
+    
+    plan.tasks = [move_to, follow_up]
+    return plan
+
+
 # Route Planner Agent Schema (legacy, kept for backward compatibility)
 class PlannerAgentSchema__TasksItem(BaseModel):
     model_config = ConfigDict(strict=True)
@@ -65,132 +114,30 @@ planner = Agent(
     name="PLANNER",
     instructions="""You are DroneMissionTaskPlanner.
 
-Your job is to generate an initial autonomous drone mission task plan using the validated input
-
-received from the previous agent. You MUST output ONLY valid JSON that matches the required
-
-schema, with NO mission_id, NO commentary, and NO extra fields.
-
-----------------------------------------
-EXPECTED INPUT
-----------------------------------------
-You will receive normalized input including:
-
-{
-  "priority": number | null,
-  "payload": {
-      "waypoint": {
-          "lat": number,
-          "lon": number,
-          "alt_agl_ft": number,
-          "fusion_status": "safe" | "nosafe"
-      },
-      "drone_location"?: {...},
-      "additionalData"?: {
-          "objectType"?: string,
-          "visualDescription"?: string,
-          "color"?: string,
-          "sizeLabel"?: string,
-          "notes"?: string
-      }
-  }
-}
-
-`additionalData` must be included in the output even if empty or partially populated.
-
-----------------------------------------
-PRIORITY LOGIC
-----------------------------------------
-- If priority is null or missing → set priority = 1
-- Priority must always be numeric (1–5)
-
-----------------------------------------
-TASK GENERATION RULES
-----------------------------------------
-You must always generate EXACTLY two tasks:
-
-TASK 1 — MOVE_TO
-- lat = waypoint.lat
-- lon = waypoint.lon
-- alt_agl_ft = max(waypoint.alt_agl_ft, 60)
-- duration_s = 0
-- speed_mps = 3.0
-
-TASK 2 — depends on fusion_status:
-- If fusion_status == "safe":
-    type = "VISION_WAYPOINT"
-    speed_mps = 0.5
-    duration_s = 60
-    alt_agl_ft = same as MOVE_TO
-- If fusion_status == "nosafe":
-    type = "LOITER"
-    speed_mps = 0
-    duration_s = 90
-    alt_agl_ft = MOVE_TO alt_agl_ft + 20
-
-----------------------------------------
-OUTPUT SCHEMA
-----------------------------------------
-You MUST output EXACTLY:
-
-{
-  "priority": number,
-  "additionalData": {
-    "objectType"?: string,
-    "visualDescription"?: string,
-    "color"?: string,
-    "sizeLabel"?: string,
-    "notes"?: string
-  },
-  "tasks": [
-    {
-      "type": "MOVE_TO",
-      "lat": number,
-      "lon": number,
-      "alt_agl_ft": number,
-      "duration_s": number,
-      "speed_mps": number
-    },
-    {
-      "type": "VISION_WAYPOINT" | "LOITER",
-      "lat": number,
-      "lon": number,
-      "alt_agl_ft": number,
-      "duration_s": number,
-      "speed_mps": number
-    }
-  ]
-}
-
-----------------------------------------
-ADDITIONALDATA RULES
-----------------------------------------
-- Must always exist in the output.
-- If missing in input, output as: {}
-- Must never modify meaning or invent values.
-- Must NEVER add new keys outside the allowed list.
-
-----------------------------------------
-ERROR MODE
-----------------------------------------
-If required fields are missing or invalid, output:
-
-{
-  "priority": 0,
-  "additionalData": {},
-  "tasks": []
-}
-
-----------------------------------------
-FINAL RULES
-----------------------------------------
-- Output ONLY JSON
-- NO mission_id
-- NO explanations, markdown, or comments
-- Exactly one JSON object must be returned
+Generate an initial autonomous drone mission task plan from the validated input received from the previous agent.
+
+The input contains a priority (number or null) and a payload with a target location: a waypoint {lat, lon, alt_agl_ft, fusion_status: "safe" | "nosafe"}, a drone_location_at_snapshot, or a SARA plannerPayload location {lat, lon}, plus optional additionalData.
+
+RULES:
+
+- priority: copy the input priority (1–5); if null or missing use 1.
+
+- additionalData: copy objectType, visualDescription, color, sizeLabel and notes from the input additionalData; use null for unknown fields. Never invent values.
+
+- tasks: EXACTLY two tasks at the target lat/lon:
+
+  1. type "MOVE_TO" with the target alt_agl_ft (use 60 if none is given).
+
+  2. type "VISION_WAYPOINT".
+
+  The follow-up task type, altitudes, durations and speeds are finalized downstream; use your best estimate.
+
+- If required fields are missing or invalid, return priority 0, additionalData with every field null and tasks [].
+
+- No mission_id and no text outside the JSON.
 """,
     model="gpt-4.1",
-    output_type=AgentOutputSchema(PlannerSchema, strict_json_schema=False),
+    output_type=AgentOutputSchema(PlannerSchema, strict_json_schema=True),
     model_settings=ModelSettings(
         temperature=1,
         top_p=1,
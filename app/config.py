@@ -0,0 +1,48 @@
+"""
+Configuration - environment loaded once at import and values resolved from it
+"""
+import os
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Only load .env if it exists (for local development)
+# In Vercel/production, use environment variables directly
+env_path = Path(__file__).parent.parent / ".env"
+if env_path.exists():
+    load_dotenv(dotenv_path=env_path)
+else:
+    load_dotenv(override=False)
+
+
+def resolve_phalanx_api_url() -> Optional[str]:
+    """Resolve the Phalanx API base URL (including the /api prefix) from the environment.
+    
+    Returns:
+        The base URL, or None if PHALANX_API_URL, VITE_API_BASE_URL and API_BASE_URL are all unset
+    """
+    # Use the same API URL configuration as Phalanx frontend uses
+    # Phalanx frontend uses VITE_API_BASE_URL which can be:
+    # - Development: http://localhost:3000 (no /api)
+    # - Production: https://your-backend.railway.app/api (with /api)
+    # Phalanx API backend (main.ts) uses:
+    #   - app.setGlobalPrefix('api') - all routes need /api prefix
+    #   - PORT from env (default 3000)
+    # So the full URL is: {base_url}/api/notifications/missions/available
+    phalanx_api_url = os.getenv("PHALANX_API_URL") or os.getenv("VITE_API_BASE_URL") or os.getenv("API_BASE_URL")
+    if not phalanx_api_url:
+        return None
+    
+    # Ensure URL doesn't end with /
+    phalanx_api_url = phalanx_api_url.rstrip('/')
+    
+    # Check if URL already includes /api, if not, add it
+    # In production, VITE_API_BASE_URL may already include /api (e.g., https://backend.railway.app/api)
+    # In development, it's usually just http://localhost:3000
+    if not phalanx_api_url.endswith('/api'):
+        phalanx_api_url = f"{phalanx_api_url}/api"
+    return phalanx_api_url
+
+
+PHALANX_API_URL = resolve_phalanx_api_url()
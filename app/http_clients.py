@@ -0,0 +1,63 @@
+"""
+Shared HTTP clients - pooled connections reused by every agent call
+"""
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+from agents import set_default_openai_client
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+_openai_client: Optional[AsyncOpenAI] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the keep-alive HTTP/2 pool shared by all agents for the app lifetime.
+
+    One pool for the vision analyzer, data validator, planner, SARA... means TLS
+    handshakes to the OpenAI API are paid once per worker, not once per run, and
+    the vision + planner pair can multiplex over the same connection. The pool
+    also becomes the one returned by get_http_client (e.g. for Phalanx calls).
+    """
+    global _http_client
+    _http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+        timeout=httpx.Timeout(120.0, connect=10.0)
+    )
+    return _http_client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP pool, creating it if startup did not."""
+    if _http_client is None or _http_client.is_closed:
+        return create_http_client()
+    return _http_client
+
+
+def install_openai_client(http_client: httpx.AsyncClient) -> AsyncOpenAI:
+    """Make the agents SDK (and get_openai_client) use the given pooled HTTP client.
+
+    Raises:
+        openai.OpenAIError: If OPENAI_API_KEY is not configured
+    """
+    global _openai_client
+    _openai_client = AsyncOpenAI(http_client=http_client)
+    set_default_openai_client(_openai_client)
+    return _openai_client
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Return the AsyncOpenAI client installed on startup.
+
+    Falls back to a client with its own connection pool when startup did not
+    install one (e.g. the workflows are used outside the FastAPI app).
+
+    Raises:
+        openai.OpenAIError: If OPENAI_API_KEY is not configured
+    """
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI()
+    return _openai_client
@@ -0,0 +1,134 @@
+"""
+Image uploads - bounded reading and validation shared by the image endpoints
+"""
+import asyncio
+import io
+import os
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from app.utils import sniff_mime, guess_mime
+
+
+# Uploaded images are read in chunks and rejected once they exceed this size;
+# 1 MiB chunks keep the read loop to a handful of calls for typical photos
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def verify_image(file: BinaryIO) -> Optional[str]:
+    """Check with Pillow that an uploaded file is an image (blocking; run it in a worker thread).
+    
+    Only the header is parsed: Image.open identifies the format without decoding
+    or walking the rest of the file, and corrupt pixel data is left for the vision
+    model to reject.
+    
+    Args:
+        file: Binary file-like object holding the image, read from the start
+    
+    Returns:
+        Canonical MIME type of the format (Pillow's Image.MIME, e.g. "image/tiff") or None if unknown
+    
+    Raises:
+        Exception: If Pillow does not recognize the file as an image
+    """
+    # Imported here so cold starts of routes that never fall back to Pillow skip its plugin init
+    from PIL import Image
+    
+    file.seek(0)
+    with Image.open(file) as img:
+        return Image.MIME.get(img.format) if img.format else None
+
+
+def image_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"The image file is too large. Maximum size is {MAX_IMAGE_BYTES // (1024 * 1024)} MB."
+    )
+
+
+def check_image_type(image: UploadFile) -> None:
+    """Reject uploads whose declared Content-Type is not an image, before reading them.
+    
+    A missing or generic application/octet-stream type is let through: the bytes are
+    sniffed (or verified with Pillow) afterwards.
+    
+    Raises:
+        HTTPException: 400 if the upload declares a non-image Content-Type
+    """
+    content_type = image.content_type
+    if content_type and content_type != "application/octet-stream" and not content_type.startswith("image/"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type '{content_type}'. Please send an image in PNG, JPEG, or similar format."
+        )
+
+
+async def read_image(image: UploadFile) -> bytes:
+    """Read an uploaded image, rejecting it as soon as it exceeds MAX_IMAGE_BYTES.
+    
+    Args:
+        image: Uploaded file from the multipart form
+    
+    Returns:
+        The image bytes (the upload itself is closed once they are read)
+    
+    Raises:
+        HTTPException: 400 if the upload is empty, 413 if it is larger than MAX_IMAGE_BYTES
+    """
+    if image.size is not None:
+        # Size is known from the multipart parser: reject without reading, or read in one go
+        if image.size > MAX_IMAGE_BYTES:
+            raise image_too_large()
+        raw = await image.read()
+    else:
+        buf = bytearray()
+        while chunk := await image.read(UPLOAD_CHUNK_SIZE):
+            buf += chunk
+            if len(buf) > MAX_IMAGE_BYTES:
+                raise image_too_large()
+        raw = bytes(buf)
+    
+    # raw is now the only copy needed: free the spooled one before the agent round-trips
+    await image.close()
+    
+    # Validate that the file is not empty
+    if not raw:
+        raise HTTPException(
+            status_code=400,
+            detail="The image file is empty. Please send a valid image."
+        )
+    return raw
+
+
+async def detect_image_mime(raw: bytes, image: UploadFile) -> str:
+    """Validate that an upload is an image and return its MIME type.
+    
+    Raises:
+        HTTPException: 400 if the bytes are not a valid image
+    """
+    # Fast path: known image signature gives the MIME type directly
+    mime_type = sniff_mime(raw[:18])
+    if not mime_type:
+        # Unknown signature: validate that it opens as an image
+        try:
+            # BytesIO over bytes shares their buffer instead of copying it
+            pillow_mime = await asyncio.to_thread(verify_image, io.BytesIO(raw))
+        except Exception:
+            raise HTTPException(
+                status_code=400,
+                detail="The provided image is invalid or corrupted. Please send an image in PNG, JPEG, or similar format."
+            )
+        
+        # Pillow's format wins; a declared type only fills in when it is specific
+        # (check_image_type lets the generic application/octet-stream through)
+        declared_mime = image.content_type if image.content_type != "application/octet-stream" else None
+        mime_type = (
+            pillow_mime
+            or declared_mime
+            or guess_mime(image.filename or "image")
+            or "application/octet-stream"
+        )
+    
+    return mime_type
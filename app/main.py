@@ -1,43 +1,181 @@
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request, Depends, Body
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from PIL import Image
-import io
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from pydantic import TypeAdapter, ValidationError
+from cachetools import TTLCache
+import fastjsonschema
+import asyncio
 import os
-import json
+import re
 import logging
-import mimetypes
-from pathlib import Path
-from typing import Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+# Prefer uvloop's faster event loop when it is installed (uvicorn[standard]);
+# "uvicorn --loop uvloop" does the same for the server process itself
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
 # Load environment variables from .env before importing the agents SDK
-# Only load .env if it exists (for local development)
-# In Vercel/production, use environment variables directly
-from dotenv import load_dotenv
-env_path = Path(__file__).parent.parent / ".env"
-if env_path.exists():
-    load_dotenv(dotenv_path=env_path)
-else:
-    # In production (Vercel), environment variables are set directly
-    load_dotenv(override=False)
+from app import config  # noqa: F401
 
 from app.schemas import (
     VisionResult,
     VisionAnalyzeResponse,
+    AnalyzeForm,
     RoutePlannerRequest,
     ObjectConfirmedRequest,
     AppendTaskRequest,
     MissionResponse,
     Task,
     Location,
+    ChatMessage,
     ChatRequest,
     ChatResponse
 )
-from app.agent_def import to_data_url, run_vision, run_planner, run_chat_workflow
+from app.agent_def import prepare_image_input, run_vision, run_planner, run_chat_workflow
+from app.images import check_image_type, read_image, detect_image_mime
+from app.http_clients import create_http_client, install_openai_client
+from app.utils import image_digest
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+def close_schema_objects(node: Any) -> Any:
+    """Copy a JSON Schema with additionalProperties: false on every object that lists properties.
+    
+    A body the closed schema accepts holds only model fields, so it can be forwarded
+    as is; anything with extra keys goes through pydantic, which drops them.
+    """
+    if isinstance(node, dict):
+        closed = {key: close_schema_objects(value) for key, value in node.items()}
+        if "properties" in closed:
+            closed.setdefault("additionalProperties", False)
+        return closed
+    if isinstance(node, list):
+        return [close_schema_objects(item) for item in node]
+    return node
+
+
+# /plan bodies are checked against a compiled JSON Schema; pydantic only runs on a
+# rejection, to coerce lax inputs (e.g. "3" for an int), drop unknown keys or explain the errors
+PLAN_REQUEST_ADAPTER = TypeAdapter(RoutePlannerRequest)
+PLAN_REQUEST_SCHEMA = PLAN_REQUEST_ADAPTER.json_schema()
+validate_plan_request = fastjsonschema.compile(close_schema_objects(PLAN_REQUEST_SCHEMA))
+
+
+def inline_schema_refs(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace the "#/$defs/..." references of a (non-recursive) JSON Schema with their definitions.
+    
+    Used for OpenAPI: request bodies given through openapi_extra cannot point into $defs.
+    """
+    defs = schema.get("$defs", {})
+    
+    def resolve(node: Any) -> Any:
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref and ref.startswith("#/$defs/"):
+                return resolve(defs[ref[len("#/$defs/"):]])
+            return {key: resolve(value) for key, value in node.items() if key != "$defs"}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+    
+    return resolve(schema)
 
+# Message for a missing or empty top-level form field, or any error on an upload
+# field; nested JSON fields (e.g. /plan's waypoint.mission_id) and other error
+# types get the formatted message
+FIELD_ERROR_MESSAGES = {
+    "image": "Image is required",
+    "file": "Image is required",
+    "prompt": "Prompt is required",
+    "mission_id": "Mission ID is required",
+    "images": "Images are required",
+    "prompts": "Prompts are required",
+}
+FORM_FIELD_ERROR_TYPES = ("missing", "string_too_short")
+# Upload fields get their message for any error: a text value sent instead of a
+# file (e.g. image=x) is a missing image too
+UPLOAD_FIELDS = ("image", "file", "images")
+
+# At most OPENAI_CONCURRENCY agent workflows in flight per worker, so bursts queue
+# here instead of hitting the provider's rate limits and retrying
+LLM_SEMAPHORE = asyncio.Semaphore(int(os.getenv("OPENAI_CONCURRENCY", "8")))
+
+# Response validators built once per process instead of on each request
+VISION_RESULT_ADAPTER = TypeAdapter(VisionResult)
+MISSION_RESPONSE_ADAPTER = TypeAdapter(MissionResponse)
+CHAT_HISTORY_ADAPTER = TypeAdapter(List[ChatMessage])
+PROMPT_LIST_ADAPTER = TypeAdapter(List[str])
+
+# Recent /analyze responses keyed by (image digest, prompt, mission_id), so client
+# retries of the same request do not pay (or bill) the agent round-trips again
+VISION_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+# /analyze requests currently running, by the same key: concurrent duplicates
+# (double submits, client retries racing the original) wait for the first one
+IN_FLIGHT_ANALYSES: Dict[Tuple[bytes, str, str], asyncio.Future] = {}
+
+# Maximum number of (prompt, image) pairs accepted by /analyze/batch
+MAX_BATCH_IMAGES = int(os.getenv("MAX_BATCH_IMAGES", "16"))
+
+# Planner priority label indexed by vision priority (1 = low, 2-3 = medium, 4-5 = high)
+PRIORITY_LABELS = ("low", "low", "medium", "medium", "high", "high")
+
+# Start the planner together with the vision agent when the prompt carries a full location.
+# The speculative plan is only used if the vision result confirms the object at that same
+# location/priority; otherwise it is cancelled (it may still bill a planner call).
+SPECULATIVE_PLANNER = os.getenv("SPECULATIVE_PLANNER", "false").lower() in ("1", "true", "yes")
+
+PROMPT_NUMBER_PATTERNS = {
+    "lat": re.compile(r"\blat(?:itude)?\b\s*[:=]?\s*(-?\d+(?:\.\d+)?)", re.IGNORECASE),
+    "lon": re.compile(r"\b(?:lon|lng|longitude)\b\s*[:=]?\s*(-?\d+(?:\.\d+)?)", re.IGNORECASE),
+    "alt_agl_ft": re.compile(r"\b(?:alt_agl_ft|alt|altitude)\b\s*[:=]?\s*(\d+(?:\.\d+)?)", re.IGNORECASE),
+    "priority": re.compile(r"\bpriority\b\s*[:=]?\s*([1-5])\b", re.IGNORECASE),
+}
+
+
+async def run_limited(workflow: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+    """Run an agent workflow while holding one of the LLM_SEMAPHORE slots"""
+    async with LLM_SEMAPHORE:
+        return await workflow(*args, **kwargs)
+
+
+def guess_planner_request(prompt: str, mission_id: str) -> Optional[Dict[str, Any]]:
+    """Build the OBJECT_CONFIRMED planner request /analyze would send, from the prompt alone.
+    
+    Returns:
+        The planner request, or None if lat, lon or alt_agl_ft cannot be found in the prompt
+    """
+    values = {}
+    for name, pattern in PROMPT_NUMBER_PATTERNS.items():
+        match = pattern.search(prompt)
+        if match:
+            values[name] = float(match.group(1))
+    
+    if not {"lat", "lon", "alt_agl_ft"} <= values.keys():
+        return None
+    
+    priority = int(values.get("priority", 3))
+    return {
+        "use_case": "OBJECT_CONFIRMED",
+        "mission_id": mission_id,
+        "priority": PRIORITY_LABELS[priority],
+        "drone_location_at_snapshot": {
+            "lat": values["lat"],
+            "lon": values["lon"],
+            "alt_agl_ft": values["alt_agl_ft"]
+        }
+    }
 
-app = FastAPI(title="Vision Agent Proxy", version="1.0.0")
+app = FastAPI(title="Vision Agent Proxy", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -52,34 +190,53 @@ app.add_middleware(
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors and return clear messages"""
-    errors = exc.errors()
     error_messages = []
     
-    for error in errors:
-        field = ".".join(str(loc) for loc in error.get("loc", []))
+    for error in exc.errors():
+        loc = error.get("loc", ())
+        
         error_type = error.get("type")
-        msg = error.get("msg")
         
-        # Custom messages based on field
-        if "image" in field.lower() or "file" in field.lower():
-            error_messages.append("Image is required")
-        elif "prompt" in field.lower():
-            error_messages.append("Prompt is required")
-        elif error_type == "missing":
-            error_messages.append(f"Field '{field}' is required")
-        else:
-            error_messages.append(f"{field}: {msg}")
+        # Custom messages for missing form fields and uploads, formatted messages otherwise
+        message = None
+        if len(loc) >= 2 and loc[0] == "body" and loc[1] in UPLOAD_FIELDS:
+            message = FIELD_ERROR_MESSAGES[loc[1]]
+        elif len(loc) == 2 and loc[0] == "body" and error_type in FORM_FIELD_ERROR_TYPES:
+            message = FIELD_ERROR_MESSAGES.get(loc[1])
+        if message is None:
+            field = ".".join(str(part) for part in loc)
+            if error_type == "missing":
+                message = f"Field '{field}' is required"
+            else:
+                message = f"{field}: {error.get('msg')}"
+        error_messages.append(message)
     
+    # A batch repeats the same form error once per prompt; report it once
+    error_messages = list(dict.fromkeys(error_messages))
     detail = ". ".join(error_messages) if error_messages else "Validation error in the submitted data"
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=400,
         content={"detail": detail}
     )
 
 
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    """Return HTTP errors as {"detail": ...} like FastAPI's default, encoded with orjson"""
+    if exc.status_code < 200 or exc.status_code in (204, 205, 304):
+        return Response(status_code=exc.status_code, headers=exc.headers)
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers=exc.headers
+    )
+
+
 @app.on_event("startup")
 async def startup_event():
-    """Verify that OPENAI_API_KEY is configured on startup"""
+    """Open the shared HTTP pool and verify that OPENAI_API_KEY is configured on startup"""
+    app.state.http = create_http_client()
+    
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         import warnings
@@ -90,82 +247,144 @@ async def startup_event():
         )
     else:
         # Log that API key is configured (without exposing the key)
-        logging.info("✓ OPENAI_API_KEY is configured")
+        logger.info("✓ OPENAI_API_KEY is configured")
+        # Route every agent run through the shared HTTP/2 pool
+        install_openai_client(app.state.http)
 
 
-@app.post("/analyze")
-async def analyze(
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled HTTP connections"""
+    await app.state.http.aclose()
+
+
+async def analyze_form(
     prompt: str = Form(...),
-    image: UploadFile = File(...),
     mission_id: str = Form(...)
-):
+) -> AnalyzeForm:
+    """Build the /analyze form model so its errors go through the validation handler.
+    
+    Async so FastAPI runs it on the event loop instead of a threadpool worker.
+    """
+    try:
+        return AnalyzeForm(prompt=prompt, mission_id=mission_id)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+        )
+
+
+def require_image(image: UploadFile) -> None:
+    """Check an /analyze image upload from its headers, before any of it is read.
+    
+    Raises:
+        HTTPException: 400 if the image is missing or declares a non-image type
+    """
     # Validate that an image was provided
     if not image or not image.filename:
         raise HTTPException(
             status_code=400, 
             detail="Image is required. Please send an image file."
         )
+    check_image_type(image)
+
+
+def vision_cache_key(raw: bytes, prompt: str, mission_id: str) -> Tuple[bytes, str, str]:
+    """Key identical (image, prompt, mission) requests by a BLAKE2 digest of the image bytes"""
+    return image_digest(raw), prompt, mission_id
+
+
+async def analyze_one(
+    prompt: str,
+    mission_id: str,
+    raw: bytes,
+    image: UploadFile
+) -> VisionAnalyzeResponse:
+    """Analyze one image upload, reusing the response of an identical recent or in-flight request.
     
-    # Validate that the file is not empty
-    raw = await image.read()
-    if not raw or len(raw) == 0:
-        raise HTTPException(
-            status_code=400,
-            detail="The image file is empty. Please send a valid image."
-        )
+    Raises:
+        HTTPException: 400 if the image is invalid, 500 if an agent fails
+    """
+    # Identical retries skip image validation and both agent calls
+    cache_key = vision_cache_key(raw, prompt, mission_id)
+    cached = VISION_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    pending = IN_FLIGHT_ANALYSES.get(cache_key)
+    if pending is not None:
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+            # The request running it was cancelled: run the analysis here instead
     
-    # Validate that it opens as an image
+    future = asyncio.get_running_loop().create_future()
+    IN_FLIGHT_ANALYSES[cache_key] = future
     try:
-        img = Image.open(io.BytesIO(raw))
-        img.verify()
-        # Get the actual image format
-        img_format = img.format.lower() if img.format else None
+        mime_type = await detect_image_mime(raw, image)
+        response = await run_analysis(prompt, mission_id, raw, image.filename, mime_type, digest=cache_key[0])
+        
+        # Do not cache a confirmed result whose planner failed, so a retry can plan again
+        if response.mission_plan or response.vision_result.use_case != "OBJECT_CONFIRMED":
+            VISION_CACHE[cache_key] = response
+        future.set_result(response)
+        return response
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
     except Exception as e:
-        raise HTTPException(
-            status_code=400,
-            detail="The provided image is invalid or corrupted. Please send an image in PNG, JPEG, or similar format."
-        )
-    
-    # Use content_type from UploadFile or detect from image format
-    mime_type = image.content_type
-    if not mime_type and img_format:
-        mime_type = f"image/{img_format}"
-    if not mime_type:
-        mime_type, _ = mimetypes.guess_type(image.filename or "image")
+        future.set_exception(e)
+        future.exception()  # retrieved here, so it is not reported when nobody waited
+        raise
+    finally:
+        if IN_FLIGHT_ANALYSES.get(cache_key) is future:
+            del IN_FLIGHT_ANALYSES[cache_key]
+
+
+async def run_analysis(
+    prompt: str,
+    mission_id: str,
+    raw: bytes,
+    filename: str,
+    mime_type: str,
+    digest: Optional[bytes] = None
+) -> VisionAnalyzeResponse:
+    """Run the vision agent on one validated image and plan a mission if the object is confirmed.
     
-    # Validate that prompt is not empty
-    if not prompt or not prompt.strip():
-        raise HTTPException(
-            status_code=400,
-            detail="Prompt is required. Please provide a description of the object to search for in the image."
-        )
+    digest is the image's image_digest when the caller already computed it.
     
-    # Validate that mission_id is not empty
-    if not mission_id or not mission_id.strip():
-        raise HTTPException(
-            status_code=400,
-            detail="Mission ID is required."
-        )
-    
-    data_url = to_data_url(raw, image.filename, mime_type=mime_type)
+    Raises:
+        HTTPException: 500 if an agent fails or returns an invalid result
+    """
+    # Optionally plan in parallel with the vision agent (see SPECULATIVE_PLANNER)
+    speculative_request = None
+    speculative_plan = None
+    if SPECULATIVE_PLANNER:
+        speculative_request = guess_planner_request(prompt, mission_id)
+        if speculative_request:
+            speculative_plan = asyncio.create_task(run_limited(run_planner, speculative_request))
     
     try:
+        data_url, file_id = await prepare_image_input(raw, filename, mime_type, digest)
+        
         # Step 1: Run vision analyzer
         # lat, lon, alt_agl_ft, and priority will be extracted from the prompt by the agent
-        result_dict = await run_vision(
+        vision_output = await run_limited(
+            run_vision,
             prompt=prompt,
             image_data_url=data_url,
-            mission_id=mission_id.strip()
+            mission_id=mission_id,
+            image_file_id=file_id
         )
         
-        # Validate and convert result
+        # Validate and convert result (a VisionResult from run_vision is returned as is)
         try:
-            vision_result = VisionResult.model_validate(result_dict)
+            vision_result = VISION_RESULT_ADAPTER.validate_python(vision_output)
         except Exception as validation_error:
-            import traceback
-            logging.error(f"Validation error for vision result: {validation_error}")
-            logging.debug(f"Result dict: {result_dict}")
-            logging.debug(traceback.format_exc())
+            logger.exception("Validation error for vision result: %s", validation_error)
+            logger.debug("Vision output: %s", vision_output)
             raise HTTPException(
                 status_code=500,
                 detail=f"Invalid response from vision agent: {str(validation_error)}"
@@ -176,13 +395,7 @@ async def analyze(
         if vision_result.use_case == "OBJECT_CONFIRMED":
             try:
                 # Convert priority (1-5) to string format for planner
-                # Priority mapping: 1-2 = low, 3 = medium, 4-5 = high
-                if vision_result.priority >= 4:
-                    priority_str = "high"
-                elif vision_result.priority >= 2:
-                    priority_str = "medium"
-                else:
-                    priority_str = "low"
+                priority_str = PRIORITY_LABELS[min(max(vision_result.priority, 0), 5)]
                 
                 # Prepare planner request
                 planner_request_data = {
@@ -192,43 +405,38 @@ async def analyze(
                     "drone_location_at_snapshot": vision_result.drone_location_at_snapshot.model_dump()
                 }
                 
-                # Call planner
-                planner_result_dict = await run_planner(planner_request_data)
-                mission_plan = MissionResponse.model_validate(planner_result_dict)
+                # Call planner (reuse the speculative plan if it was made for this exact request)
+                if speculative_plan and speculative_request == planner_request_data:
+                    planner_result_dict = await speculative_plan
+                else:
+                    planner_result_dict = await run_limited(run_planner, planner_request_data)
+                mission_plan = MISSION_RESPONSE_ADAPTER.validate_python(planner_result_dict)
             except Exception as planner_error:
                 # Log planner error but don't fail the vision result
                 # The vision result is still valid even if planner fails
-                import logging
-                logging.warning(f"Planner failed after OBJECT_CONFIRMED: {str(planner_error)}", exc_info=True)
+                logger.warning("Planner failed after OBJECT_CONFIRMED: %s", planner_error, exc_info=True)
                 # Continue without mission_plan
         
         # Return combined response
-        response = VisionAnalyzeResponse(
+        return VisionAnalyzeResponse(
             vision_result=vision_result,
             mission_plan=mission_plan
         )
-        return JSONResponse(content=response.model_dump(exclude_none=True))
     
     except HTTPException:
         raise
     except ValueError as e:
         # Pydantic validation errors
-        import traceback
         error_detail = str(e)
-        traceback_str = traceback.format_exc()
-        logging.error(f"ValueError in /analyze: {error_detail}")
-        logging.debug(traceback_str)
+        logger.exception("ValueError in /analyze: %s", error_detail)
         raise HTTPException(
             status_code=500,
             detail=f"Error processing agent response: {error_detail}"
         )
     except Exception as e:
         # Other errors - log full traceback for debugging
-        import traceback
         error_msg = str(e)
-        traceback_str = traceback.format_exc()
-        logging.error(f"Exception in /analyze: {error_msg}")
-        logging.debug(traceback_str)
+        logger.exception("Exception in /analyze: %s", error_msg)
         
         if "api_key" in error_msg.lower() or "OPENAI_API_KEY" in error_msg:
             raise HTTPException(
@@ -239,27 +447,121 @@ async def analyze(
             status_code=500,
             detail=f"Internal server error: {error_msg}"
         )
+    finally:
+        # Drop a speculative plan that was not used (or whose request failed)
+        if speculative_plan:
+            if speculative_plan.done():
+                if not speculative_plan.cancelled():
+                    speculative_plan.exception()
+            else:
+                speculative_plan.cancel()
+
+
+@app.post("/analyze", response_model=VisionAnalyzeResponse, response_model_exclude_none=True)
+async def analyze(
+    form: AnalyzeForm = Depends(analyze_form),
+    image: UploadFile = File(...)
+):
+    # prompt and mission_id are validated by analyze_form before the image is read
+    require_image(image)
+    raw = await read_image(image)
+    return await analyze_one(form.prompt, form.mission_id, raw, image)
 
 
-@app.post("/plan", response_model=MissionResponse)
-async def plan_route(request: RoutePlannerRequest):
+@app.post("/batch-analyze", response_model=List[VisionAnalyzeResponse], response_model_exclude_none=True, deprecated=True)
+@app.post("/analyze/batch", response_model=List[VisionAnalyzeResponse], response_model_exclude_none=True)
+async def batch_analyze(
+    prompts: List[str] = Form(...),
+    images: List[UploadFile] = File(...),
+    mission_id: str = Form(...)
+):
+    """
+    Analyze several (prompt, image) pairs of one mission in a single request.
+    
+    prompts[i] is applied to images[i]; the pairs run concurrently (bounded by
+    OPENAI_CONCURRENCY) and results are returned in the same order. The prompts
+    can also be sent as a single field holding a JSON array of strings.
+    Duplicate (prompt, image) pairs in a batch share one agent run.
+    
+    /batch-analyze is the original path of this endpoint and is deprecated in
+    favour of /analyze/batch.
+    """
+    # A single prompts field holding a JSON array is the prompt list, whatever
+    # the number of images
+    if len(prompts) == 1 and prompts[0].lstrip().startswith("["):
+        try:
+            prompts = PROMPT_LIST_ADAPTER.validate_json(prompts[0])
+        except ValidationError:
+            pass
+    
+    if len(prompts) != len(images):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Got {len(prompts)} prompts for {len(images)} images. Send one prompt per image."
+        )
+    if len(images) > MAX_BATCH_IMAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many images. Maximum is {MAX_BATCH_IMAGES} per batch."
+        )
+    
+    # Reject bad text fields or image headers before reading any image
+    forms = [await analyze_form(prompt=prompt, mission_id=mission_id) for prompt in prompts]
+    for image in images:
+        require_image(image)
+    uploads = [await read_image(image) for image in images]
+    
+    results = await asyncio.gather(
+        *(
+            analyze_one(form.prompt, form.mission_id, raw, image)
+            for form, image, raw in zip(forms, images, uploads)
+        ),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+@app.post(
+    "/plan",
+    response_model=MissionResponse,
+    # The body is taken as a plain dict for speed; document it as RoutePlannerRequest
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": inline_schema_refs(PLAN_REQUEST_SCHEMA)}}
+        }
+    }
+)
+async def plan_route(request: Dict[str, Any] = Body(...)):
     """
     Route planner endpoint that handles two use cases:
     - OBJECT_CONFIRMED: Creates a mission to return to a location where an object was detected
     - APPEND_TASK: Appends a vision waypoint task to an existing mission
     
+    The body must match RoutePlannerRequest (ObjectConfirmedRequest or AppendTaskRequest).
     Uses the DroneMissionTaskPlanner agent to generate mission tasks.
     """
     try:
-        # Convert request to dict for the agent
-        input_data = request.model_dump()
-        
-        # Run the planner agent
-        result_dict = await run_planner(input_data)
+        validate_plan_request(request)
+    except fastjsonschema.JsonSchemaValueException:
+        # The strict schema has no type coercion and no extra keys: pydantic decides,
+        # and either produces field-level error messages or the clean body to forward
+        try:
+            request = PLAN_REQUEST_ADAPTER.dump_python(PLAN_REQUEST_ADAPTER.validate_python(request))
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+            )
+    
+    try:
+        # Run the planner agent on the validated body
+        result_dict = await run_limited(run_planner, request)
         
         # Validate and return the response
-        result = MissionResponse.model_validate(result_dict)
-        return JSONResponse(content=result.model_dump())
+        return MISSION_RESPONSE_ADAPTER.validate_python(result_dict)
     
     except HTTPException:
         raise
@@ -290,7 +592,7 @@ async def plan_route(request: RoutePlannerRequest):
         )
 
 
-@app.post("/chat", response_model=ChatResponse)
+@app.post("/chat", response_model=ChatResponse, response_model_exclude_none=True)
 async def chat(
     message: str = Form(...),
     conversation_history: Optional[str] = Form(None),
@@ -306,54 +608,32 @@ async def chat(
         parsed_history = None
         if conversation_history:
             try:
-                history_data = json.loads(conversation_history)
-                parsed_history = [
-                    {"role": msg.get("role", "user"), "content": msg.get("content", "")}
-                    for msg in history_data
-                ]
-            except json.JSONDecodeError:
+                # Parse and validate in one pass (pydantic-core JSON parser)
+                parsed_history = CHAT_HISTORY_ADAPTER.dump_python(
+                    CHAT_HISTORY_ADAPTER.validate_json(conversation_history)
+                )
+            except ValidationError:
                 raise HTTPException(
                     status_code=400,
-                    detail="Invalid conversation_history format. Expected JSON array."
+                    detail="Invalid conversation_history format. Expected JSON array of {role, content} messages."
                 )
         
         # Handle image if provided
         image_data_url = None
+        image_file_id = None
         if image and image.filename:
-            # Validate that the file is not empty
-            raw = await image.read()
-            if not raw or len(raw) == 0:
-                raise HTTPException(
-                    status_code=400,
-                    detail="The image file is empty. Please send a valid image."
-                )
-            
-            # Validate that it opens as an image
-            try:
-                img = Image.open(io.BytesIO(raw))
-                img.verify()
-                img_format = img.format.lower() if img.format else None
-            except Exception:
-                raise HTTPException(
-                    status_code=400,
-                    detail="The provided image is invalid or corrupted. Please send an image in PNG, JPEG, or similar format."
-                )
-            
-            # Get MIME type
-            mime_type = image.content_type
-            if not mime_type and img_format:
-                mime_type = f"image/{img_format}"
-            if not mime_type:
-                mime_type, _ = mimetypes.guess_type(image.filename or "image")
-            
-            # Convert to data URL
-            image_data_url = to_data_url(raw, image.filename or "image", mime_type)
+            check_image_type(image)
+            raw = await read_image(image)
+            mime_type = await detect_image_mime(raw, image)
+            image_data_url, image_file_id = await prepare_image_input(raw, image.filename, mime_type)
         
         # Run the chat workflow
-        result = await run_chat_workflow(
+        result = await run_limited(
+            run_chat_workflow,
             message=message,
             conversation_history=parsed_history,
-            image_data_url=image_data_url
+            image_data_url=image_data_url,
+            image_file_id=image_file_id
         )
         
         # Validate and return the response
@@ -362,7 +642,7 @@ async def chat(
             conversation_id=result.get("conversation_id"),
             console_message=result.get("console_message")
         )
-        return JSONResponse(content=response.model_dump(exclude_none=True))
+        return response
     
     except HTTPException:
         raise
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Literal, Optional, Union
 
 
@@ -24,6 +24,14 @@ class VisionResult(BaseModel):
     drone_location_at_snapshot: Location
 
 
+class AnalyzeForm(BaseModel):
+    """Text fields of the /analyze multipart form (the image is handled separately)"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    prompt: str = Field(min_length=1, description="Description of the object plus drone location/priority info.")
+    mission_id: str = Field(min_length=1)
+
+
 class VisionAnalyzeResponse(BaseModel):
     """Response from /analyze endpoint that may include planner result"""
     vision_result: VisionResult
@@ -1,9 +1,97 @@
 """
 Utility functions for the application
 """
-import base64
-import mimetypes
-from typing import Optional
+import hashlib
+import os
+from typing import Dict, Optional
+
+# pybase64's SIMD encoder is several times faster than the stdlib and releases the GIL
+try:
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+
+# Leading bytes of the image formats we accept, checked before falling back to Pillow
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+# Sizes of the BMP DIB headers (BITMAPCOREHEADER, BITMAPINFOHEADER and its V2-V5 successors).
+# "BM" alone also starts plain text, so a BMP must also have zero reserved bytes and one of these
+BMP_DIB_HEADER_SIZES = frozenset((12, 40, 52, 56, 64, 108, 124))
+
+
+def sniff_mime(header: bytes) -> Optional[str]:
+    """Detect the MIME type of an image from its magic number.
+    
+    Args:
+        header: First bytes of the file (at least 12 for WebP, 18 for BMP)
+    
+    Returns:
+        MIME type (e.g. "image/png") or None if the signature is not recognized
+    """
+    # WebP: "RIFF" + 4-byte size + "WEBP"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    # BMP: "BM" + 4-byte file size + 4 reserved zero bytes + pixel offset + DIB header size
+    if (
+        header[:2] == b"BM"
+        and header[6:10] == b"\x00\x00\x00\x00"
+        and int.from_bytes(header[14:18], "little") in BMP_DIB_HEADER_SIZES
+    ):
+        return "image/bmp"
+    for signature, mime in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return mime
+    return None
+
+
+def image_digest(data: bytes) -> bytes:
+    """BLAKE2 digest of image bytes, computed once per upload and shared by the image caches"""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+# MIME types keyed by lower-case file extension: the image types are precomputed,
+# anything else is filled from mimetypes.guess_type on first use
+MIME_BY_EXTENSION: Dict[str, Optional[str]] = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".bmp": "image/bmp",
+    ".webp": "image/webp",
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+}
+
+
+def guess_mime(filename: str) -> Optional[str]:
+    """Guess a MIME type from a file name, caching the result per extension.
+    
+    Args:
+        filename: File name (only its extension is used)
+    
+    Returns:
+        MIME type or None if the extension is unknown
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in MIME_BY_EXTENSION:
+        import mimetypes  # only needed when the signature sniff misses; loads the system MIME tables
+        MIME_BY_EXTENSION[extension] = mimetypes.guess_type(f"file{extension}")[0]
+    return MIME_BY_EXTENSION[extension]
+
+
+# Precomputed "data:<mime>;base64," prefixes for the image types we sniff
+DATA_URL_PREFIXES: Dict[str, bytes] = {
+    mime: f"data:{mime};base64,".encode("ascii")
+    for mime in ("image/png", "image/jpeg", "image/gif", "image/bmp", "image/webp", "image/tiff")
+}
 
 
 def to_data_url(data: bytes, filename: str, mime_type: Optional[str] = None) -> str:
@@ -17,14 +105,14 @@ def to_data_url(data: bytes, filename: str, mime_type: Optional[str] = None) ->
     Returns:
         Data URL in format: data:image/{format};base64,{base64_encoded_data}
     """
-    if mime_type:
-        mime = mime_type
-    else:
-        mime, _ = mimetypes.guess_type(filename)
-        if not mime:
-            mime = "application/octet-stream"
-    
-    base64_encoded = base64.b64encode(data).decode('utf-8')
-    return f"data:{mime};base64,{base64_encoded}"
+    mime = mime_type or guess_mime(filename) or "application/octet-stream"
+    
+    prefix = DATA_URL_PREFIXES.get(mime)
+    if prefix is None:
+        # Uncommon (possibly client-supplied) type: build it without caching
+        return f"data:{mime};base64,{b64encode(data).decode('ascii')}"
+    
+    # Join as bytes and decode the ASCII-only result once
+    return (prefix + b64encode(data)).decode("ascii")
 
 
@@ -2,20 +2,14 @@
 Workflow functions - Orchestrate agent execution
 """
 from typing import Dict, Any, Optional, List, Tuple
-import json
-import os
 import logging
 from pydantic import BaseModel
-from pathlib import Path
+from cachetools import TTLCache
 import httpx
+import orjson
 
 # Load environment variables
-from dotenv import load_dotenv
-env_path = Path(__file__).parent.parent / ".env"
-if env_path.exists():
-    load_dotenv(dotenv_path=env_path)
-else:
-    load_dotenv(override=False)
+from app.config import PHALANX_API_URL
 
 from agents import Runner, RunConfig, TResponseInputItem, trace
 
@@ -26,18 +20,83 @@ from app.agents import (
     sara,
     sara_formatter_agent
 )
-from app.utils import to_data_url
+from app.agents.planner import apply_task_rules
+from app.http_clients import get_http_client, get_openai_client
+from app.schemas import Location, VisionResult
+from app.utils import image_digest, to_data_url
 
 
 class WorkflowInput(BaseModel):
     input_as_text: str
 
 
+# Images above this size are uploaded to the OpenAI Files API instead of inlined as base64
+IMAGE_FILE_REF_THRESHOLD = 256 * 1024
+
+# Uploaded file IDs keyed by a BLAKE2 digest of the image bytes; entries expire
+# well before the files themselves (one hour) so a cached ID is always valid
+UPLOADED_IMAGE_IDS: TTLCache = TTLCache(maxsize=512, ttl=3000)
+
+
+async def upload_image_ref(
+    data: bytes,
+    filename: str,
+    mime_type: str,
+    digest: Optional[bytes] = None
+) -> str:
+    """Upload an image to the OpenAI Files API so it can be referenced by ID.
+    
+    Large images sent this way avoid the base64 data URL (33% bigger) in the
+    model request. Uploaded files expire automatically after one hour; the same
+    bytes uploaded again within that window reuse the existing file ID.
+    
+    Args:
+        data: Binary image data
+        filename: Original file name
+        mime_type: MIME type of the image
+        digest: image_digest(data), if the caller already has it
+    
+    Returns:
+        The OpenAI file ID to use as input_image.file_id
+    """
+    key = digest or image_digest(data)
+    file_id = UPLOADED_IMAGE_IDS.get(key)
+    if file_id is None:
+        file_object = await get_openai_client().files.create(
+            file=(filename, bytes(data), mime_type),
+            purpose="vision",
+            expires_after={"anchor": "created_at", "seconds": 3600}
+        )
+        file_id = UPLOADED_IMAGE_IDS[key] = file_object.id
+    return file_id
+
+
+async def prepare_image_input(
+    data: bytes,
+    filename: str,
+    mime_type: str,
+    digest: Optional[bytes] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """Turn image bytes into the reference the agents are given.
+    
+    Images above IMAGE_FILE_REF_THRESHOLD are uploaded with upload_image_ref and
+    passed by file ID (digest, if given, saves hashing them again); smaller ones
+    are inlined as a base64 data URL.
+    
+    Returns:
+        (image_data_url, image_file_id), exactly one of which is set
+    """
+    if len(data) > IMAGE_FILE_REF_THRESHOLD:
+        return None, await upload_image_ref(data, filename, mime_type, digest)
+    return to_data_url(data, filename, mime_type=mime_type), None
+
+
 async def run_vision(
     prompt: str, 
-    image_data_url: str, 
-    mission_id: str
-) -> Dict[str, Any]:
+    image_data_url: Optional[str], 
+    mission_id: str,
+    image_file_id: Optional[str] = None
+) -> VisionResult:
     """Run the vision analyzer agent with image and prompt data.
     
     The prompt should contain all necessary information including:
@@ -47,12 +106,16 @@ async def run_vision(
     
     Args:
         prompt: Description of the object to identify and location/priority info
-        image_data_url: Base64 data URL of the image
+        image_data_url: Base64 data URL of the image (or use image_file_id)
         mission_id: Mission ID (required)
+        image_file_id: OpenAI file ID of an image uploaded with upload_image_ref
     
     Returns:
-        Dictionary with the vision analysis result
+        The vision analysis result
     """
+    if not image_data_url and not image_file_id:
+        raise ValueError("Either image_data_url or image_file_id is required")
+    
     # Build input text - the prompt should contain all information
     # The agent will extract lat, lon, alt_agl_ft, and priority from the prompt
     input_parts = [
@@ -62,12 +125,17 @@ async def run_vision(
     
     input_text = "\n".join(input_parts)
     
+    if image_file_id:
+        image_item = {"type": "input_image", "file_id": image_file_id, "detail": "auto"}
+    else:
+        image_item = {"type": "input_image", "image_url": image_data_url}
+    
     items: List[Dict[str, Any]] = [
         {
             "role": "user",
             "content": [
                 {"type": "input_text", "text": input_text},
-                {"type": "input_image", "image_url": image_data_url}
+                image_item
             ]
         }
     ]
@@ -84,64 +152,51 @@ async def run_vision(
     if not result.final_output:
         raise RuntimeError("Agent result is undefined")
     
-    # final_output is already a pydantic model from the schema → convert to clean dict
-    output_dict = result.final_output.model_dump()
-    
-    # Ensure mission_id exists (use provided)
-    if "mission_id" not in output_dict or not output_dict["mission_id"]:
-        output_dict["mission_id"] = mission_id
-    
-    # Ensure priority exists (default to 3 if not extracted from prompt)
-    if "priority" not in output_dict or output_dict["priority"] is None:
-        output_dict["priority"] = 3
-    
-    # Ensure drone_location_at_snapshot is properly formatted as Location object
-    # The agent should extract this from the prompt
-    if "drone_location_at_snapshot" not in output_dict or not output_dict["drone_location_at_snapshot"]:
-        # If agent didn't extract location, raise an error
-        raise ValueError("Agent failed to extract drone location (lat, lon, alt_agl_ft) from prompt")
-    
-    loc_dict = output_dict["drone_location_at_snapshot"]
-    if isinstance(loc_dict, dict):
-        # Ensure all required fields are present
-        if "lat" not in loc_dict or "lon" not in loc_dict or "alt_agl_ft" not in loc_dict:
-            raise ValueError("Agent extracted incomplete location data. Required: lat, lon, alt_agl_ft")
-        # Convert dict to Location format for response schema
-        output_dict["drone_location_at_snapshot"] = {
-            "lat": float(loc_dict["lat"]),
-            "lon": float(loc_dict["lon"]),
-            "alt_agl_ft": float(loc_dict["alt_agl_ft"])
-        }
-    else:
-        raise ValueError("Agent returned invalid location data format")
-    
-    return output_dict
+    # final_output was validated by the agent's strict schema, which has the same
+    # fields as VisionResult: build the response models without validating again
+    output = result.final_output
+    location = output.drone_location_at_snapshot
+    return VisionResult.model_construct(
+        use_case=output.use_case,
+        # Ensure mission_id exists (use provided)
+        mission_id=output.mission_id or mission_id,
+        priority=output.priority,
+        drone_location_at_snapshot=Location.model_construct(
+            lat=location.lat,
+            lon=location.lon,
+            alt_agl_ft=location.alt_agl_ft
+        )
+    )
 
 
 async def run_workflow(
     workflow_input: WorkflowInput, 
     image_data_url: Optional[str] = None,
-    previous_history: Optional[List[Dict[str, Any]]] = None
+    previous_history: Optional[List[Dict[str, Any]]] = None,
+    image_file_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """Main workflow entrypoint for SARA chat workflow."""
     with trace("SARA"):
-        state = {}
-        workflow = workflow_input.model_dump()
-        
         conversation_history: List[TResponseInputItem] = [
             {
                 "role": "user",
                 "content": [
                     {
                         "type": "input_text",
-                        "text": workflow["input_as_text"]
+                        "text": workflow_input.input_as_text
                     }
                 ]
             }
         ]
         
         # Add image if provided
-        if image_data_url:
+        if image_file_id:
+            conversation_history[0]["content"].append({
+                "type": "input_image",
+                "file_id": image_file_id,
+                "detail": "auto"
+            })
+        elif image_data_url:
             conversation_history[0]["content"].append({
                 "type": "input_image",
                 "image_url": image_data_url
@@ -160,15 +215,13 @@ async def run_workflow(
         
         conversation_history.extend([item.to_input_item() for item in sara_result_temp.new_items])
         
-        sara_result = {
-            "output_text": sara_result_temp.final_output.json(),
-            "output_parsed": sara_result_temp.final_output.model_dump()
-        }
+        # Read SARA's decision straight from the parsed output model
+        sara_output = sara_result_temp.final_output
         
         # Capture console message from SARA if available
-        console_message = sara_result["output_parsed"].get("messageForConsole")
+        console_message = sara_output.messageForConsole
         
-        if sara_result["output_parsed"]["status"] == "MISSION_READY":
+        if sara_output.status == "MISSION_READY":
             planner_result_temp = await Runner.run(
                 planner,
                 input=[
@@ -182,9 +235,12 @@ async def run_workflow(
             
             conversation_history.extend([item.to_input_item() for item in planner_result_temp.new_items])
             
+            planner_output = apply_task_rules(planner_result_temp.final_output)
+            # Dump once; the response text is the same dict encoded with orjson
+            planner_parsed = planner_output.model_dump()
             planner_result = {
-                "output_text": planner_result_temp.final_output.json(),
-                "output_parsed": planner_result_temp.final_output.model_dump()
+                "output_text": orjson.dumps(planner_parsed).decode(),
+                "output_parsed": planner_parsed
             }
             
             # Create mission in Phalanx
@@ -235,7 +291,8 @@ async def run_workflow(
 async def run_chat_workflow(
     message: str, 
     conversation_history: Optional[List[Dict[str, Any]]] = None, 
-    image_data_url: Optional[str] = None
+    image_data_url: Optional[str] = None,
+    image_file_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """Run the SARA chat workflow.
     
@@ -243,6 +300,7 @@ async def run_chat_workflow(
         message: User's message
         conversation_history: Optional list of previous messages in the conversation
         image_data_url: Optional base64 data URL of an image to include with the message
+        image_file_id: Optional OpenAI file ID of an image uploaded with upload_image_ref
     
     Returns:
         Dictionary with the chat response
@@ -256,7 +314,8 @@ async def run_chat_workflow(
     workflow_result = await run_workflow(
         workflow_input, 
         image_data_url=image_data_url,
-        previous_history=conversation_history
+        previous_history=conversation_history,
+        image_file_id=image_file_id
     )
     
     return {
@@ -279,8 +338,8 @@ async def run_planner(input_data: Dict[str, Any]) -> Dict[str, Any]:
         RuntimeError: If validation fails or agent result is undefined
         ValueError: If validation returns errors
     """
-    # Convert input data to JSON string for the validator
-    input_text = json.dumps(input_data, indent=2)
+    # Convert input data to compact JSON for the validator (the model does not need indentation)
+    input_text = orjson.dumps(input_data).decode()
     
     conversation_history: List[Dict[str, Any]] = [
         {
@@ -332,8 +391,21 @@ async def run_planner(input_data: Dict[str, Any]) -> Dict[str, Any]:
     if not planner_result.final_output:
         raise RuntimeError("Planner agent result is undefined")
     
-    # final_output is already a pydantic model from the schema → convert to clean dict
-    return planner_result.final_output.model_dump()
+    # final_output is already a pydantic model from the schema → convert to clean dict;
+    # the follow-up task type comes from the APPEND_TASK waypoint, not the agent
+    fusion_status = (input_data.get("waypoint") or {}).get("fusion_status")
+    return apply_task_rules(planner_result.final_output, fusion_status).model_dump()
+
+
+# Planner task type -> Phalanx task type. Phalanx only accepts LOITER, PATROL and
+# ORBIT; MOVE_TO, VISION_WAYPOINT and unknown types map to LOITER (closest match)
+PHALANX_TASK_TYPE_MAP = {
+    "LOITER": "LOITER",
+    "PATROL": "PATROL",
+    "ORBIT": "ORBIT",
+    "MOVE_TO": "LOITER",
+    "VISION_WAYPOINT": "LOITER",
+}
 
 
 async def create_mission_in_phalanx(planner_output: Dict[str, Any]) -> Tuple[Optional[str], str]:
@@ -347,19 +419,8 @@ async def create_mission_in_phalanx(planner_output: Dict[str, Any]) -> Tuple[Opt
     Returns:
         Tuple of (Mission ID if successful, None otherwise, error detail message)
     """
-    # Use the same API URL configuration as Phalanx frontend uses
-    # Phalanx frontend uses VITE_API_BASE_URL which can be:
-    # - Development: http://localhost:3000 (no /api)
-    # - Production: https://your-backend.railway.app/api (with /api)
-    # Phalanx API backend (main.ts) uses:
-    #   - app.setGlobalPrefix('api') - all routes need /api prefix
-    #   - PORT from env (default 3000)
-    # So the full URL is: {base_url}/api/notifications/missions/available
-    phalanx_api_url = os.getenv("PHALANX_API_URL") or os.getenv("VITE_API_BASE_URL") or os.getenv("API_BASE_URL")
-    logging.debug(f"PHALANX_API_URL from env: {os.getenv('PHALANX_API_URL')}")
-    logging.debug(f"VITE_API_BASE_URL from env: {os.getenv('VITE_API_BASE_URL')}")
-    logging.debug(f"API_BASE_URL from env: {os.getenv('API_BASE_URL')}")
-    logging.debug(f"Resolved phalanx_api_url: {phalanx_api_url}")
+    # Resolved once at import from PHALANX_API_URL / VITE_API_BASE_URL / API_BASE_URL
+    phalanx_api_url = PHALANX_API_URL
     
     if not phalanx_api_url:
         # If not configured, log warning and skip mission creation
@@ -367,52 +428,31 @@ async def create_mission_in_phalanx(planner_output: Dict[str, Any]) -> Tuple[Opt
         logging.warning(error_msg)
         return None, error_msg
     
-    # Ensure URL doesn't end with /
-    phalanx_api_url = phalanx_api_url.rstrip('/')
-    
-    # Check if URL already includes /api, if not, add it
-    # Phalanx backend uses app.setGlobalPrefix('api') in main.ts, so all routes need /api prefix
-    # In production, VITE_API_BASE_URL may already include /api (e.g., https://backend.railway.app/api)
-    # In development, it's usually just http://localhost:3000
-    if not phalanx_api_url.endswith('/api'):
-        # Add /api prefix if not present
-        phalanx_api_url = f"{phalanx_api_url}/api"
-    
     logging.info(f"Final Phalanx API URL: {phalanx_api_url}")
     
     # Convert planner tasks to Phalanx format
     # Phalanx only accepts: LOITER, PATROL, ORBIT
     # Planner can generate: MOVE_TO, LOITER, VISION_WAYPOINT
-    phalanx_tasks = []
-    for task in planner_output.get("tasks", []):
-        task_type = task.get("type", "").upper()
-        # Map planner task types to Phalanx task types
-        # MOVE_TO and VISION_WAYPOINT -> LOITER (closest match)
-        if task_type in ["LOITER", "PATROL", "ORBIT"]:
-            phalanx_task_type = task_type
-        elif task_type in ["MOVE_TO", "VISION_WAYPOINT"]:
-            phalanx_task_type = "LOITER"  # Default to LOITER for movement tasks
-        else:
-            phalanx_task_type = "LOITER"  # Default fallback
-        
-        phalanx_tasks.append({
-            "type": phalanx_task_type,
+    phalanx_tasks = [
+        {
+            "type": PHALANX_TASK_TYPE_MAP.get(task.get("type", "").upper(), "LOITER"),
             "alt_agl_ft": task.get("alt_agl_ft", 100),
             "duration_s": int(task.get("duration_s", 60))
-        })
+        }
+        for task in planner_output.get("tasks", ())
+    ]
     
     # If no valid tasks, don't create mission
     if not phalanx_tasks:
         return None, "No valid tasks found in planner output"
     
     # Ensure priority is a valid integer (1-5)
-    priority_value = planner_output.get("priority", 3)
-    if isinstance(priority_value, float):
-        priority_value = int(round(priority_value))
-    elif not isinstance(priority_value, int):
-        priority_value = int(priority_value) if priority_value else 3
+    try:
+        priority_value = round(float(planner_output.get("priority", 3)))
+    except (TypeError, ValueError):
+        priority_value = 3
     # Clamp priority to valid range (1-5)
-    priority_value = max(1, min(5, priority_value))
+    priority_value = 1 if priority_value < 1 else 5 if priority_value > 5 else priority_value
     
     mission_data = {
         "priority": priority_value,
@@ -421,27 +461,33 @@ async def create_mission_in_phalanx(planner_output: Dict[str, Any]) -> Tuple[Opt
     }
     
     try:
-        logging.debug(f"Mission data to send: {json.dumps(mission_data, indent=2)}")
+        # Encode once with orjson; the same bytes are logged and sent as the body
+        body = orjson.dumps(mission_data)
+        debug = logging.root.isEnabledFor(logging.DEBUG)
+        if debug:
+            logging.debug("Mission data to send: %s", body.decode())
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # phalanx_api_url already includes /api prefix, so just add the route
-            url = f"{phalanx_api_url}/notifications/missions/available"
-            logging.info(f"Creating mission in Phalanx: POST {url}")
-            
-            response = await client.post(
-                url,
-                json=mission_data,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            logging.debug(f"Response status: {response.status_code}")
-            logging.debug(f"Response body: {response.text}")
-            
-            response.raise_for_status()
-            result = response.json()
-            mission_id = result.get("data")
-            logging.info(f"Mission created successfully with ID: {mission_id}")
-            return mission_id, ""
+        # phalanx_api_url already includes /api prefix, so just add the route
+        url = f"{phalanx_api_url}/notifications/missions/available"
+        logging.info(f"Creating mission in Phalanx: POST {url}")
+        
+        # Reuse the shared keep-alive pool instead of a new connection per mission
+        response = await get_http_client().post(
+            url,
+            content=body,
+            headers={"Content-Type": "application/json"},
+            timeout=10.0
+        )
+        
+        logging.debug("Response status: %s", response.status_code)
+        if debug:
+            logging.debug("Response body: %s", response.text)
+        
+        response.raise_for_status()
+        result = response.json()
+        mission_id = result.get("data")
+        logging.info(f"Mission created successfully with ID: {mission_id}")
+        return mission_id, ""
     except httpx.HTTPStatusError as e:
         error_detail = f"HTTP {e.response.status_code}: {e.response.text}"
         logging.error(f"HTTP error creating mission in Phalanx: {error_detail}")
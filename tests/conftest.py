@@ -0,0 +1,35 @@
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+
+from app.main import app, VISION_CACHE
+
+
+@pytest.fixture(scope="session")
+def client():
+    # One app startup/shutdown for the whole session (per xdist worker)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest_asyncio.fixture
+async def aclient():
+    """Async client calling the app in the test's own event loop (no TestClient thread portal)"""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as async_client:
+        yield async_client
+
+
+@pytest.fixture
+def mock_run_vision():
+    """Patch the vision agent call; tests set return_value or side_effect"""
+    with patch("app.main.run_vision", new_callable=AsyncMock) as mock_run:
+        yield mock_run
+
+
+@pytest.fixture(autouse=True)
+def clear_vision_cache():
+    """Keep cached /analyze responses from leaking between tests"""
+    VISION_CACHE.clear()
+    yield
@@ -0,0 +1,39 @@
+"""
+Request-building helpers shared by the test modules
+"""
+from typing import Optional, Tuple
+
+
+# Minimal valid PNG (1x1 red pixel), so the tests do not need Pillow to build one
+VALID_PNG = (
+    b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde"
+    b"\x00\x00\x00\x0cIDATx\x9cc\xf8\xcf\xc0\x00\x00\x03\x01\x01\x00\xc9\xfe\x92\xef"
+    b"\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+
+
+MULTIPART_BOUNDARY = "contract-test-boundary"
+MULTIPART_HEADERS = {"content-type": f"multipart/form-data; boundary={MULTIPART_BOUNDARY}"}
+
+
+def encode_multipart(fields: dict, image: Optional[Tuple[str, bytes, str]] = None) -> bytes:
+    """Encode form fields and an optional (filename, bytes, content type) image upload.
+    
+    Tests encode their request bodies once at import and post them with
+    content=..., headers=MULTIPART_HEADERS instead of re-encoding them per request.
+    """
+    delimiter = f"--{MULTIPART_BOUNDARY}\r\n".encode()
+    parts = [
+        delimiter + f'Content-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    if image is not None:
+        filename, data, content_type = image
+        parts.append(
+            delimiter
+            + f'Content-Disposition: form-data; name="image"; filename="{filename}"\r\n'.encode()
+            + f"Content-Type: {content_type}\r\n\r\n".encode()
+            + data
+            + b"\r\n"
+        )
+    return b"".join(parts) + f"--{MULTIPART_BOUNDARY}--\r\n".encode()
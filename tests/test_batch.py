@@ -0,0 +1,79 @@
+from tests.helpers import VALID_PNG
+
+
+def vision_result(mission_id: str, lat: float) -> dict:
+    return {
+        "use_case": "OBJECT_NOT_FOUND",
+        "mission_id": mission_id,
+        "priority": 3,
+        "drone_location_at_snapshot": {"lat": lat, "lon": -67.89, "alt_agl_ft": 100.0}
+    }
+
+
+def png_uploads(count: int) -> list:
+    return [("images", (f"image_{i}.png", VALID_PNG, "image/png")) for i in range(count)]
+
+
+def test_batch_prompt_image_count_mismatch(client, mock_run_vision):
+    """Test 400 when the number of prompts and images differ"""
+    response = client.post(
+        "/analyze/batch",
+        data={"prompts": ["first", "second"], "mission_id": "mis_001"},
+        files=png_uploads(3)
+    )
+    assert response.status_code == 400
+    assert "2 prompts for 3 images" in response.json()["detail"]
+    mock_run_vision.assert_not_called()
+
+
+def test_batch_results_in_request_order(client, mock_run_vision):
+    """Test that results[i] belongs to prompts[i] and images[i]"""
+    latitudes = {"first": 1.0, "second": 2.0, "third": 3.0}
+    mock_run_vision.side_effect = lambda prompt, mission_id, **kwargs: vision_result(mission_id, latitudes[prompt])
+
+    response = client.post(
+        "/analyze/batch",
+        data={"prompts": ["first", "second", "third"], "mission_id": "mis_001"},
+        files=png_uploads(3)
+    )
+
+    assert response.status_code == 200
+    assert [item["vision_result"]["drone_location_at_snapshot"]["lat"] for item in response.json()] == [1.0, 2.0, 3.0]
+
+
+def test_batch_fails_on_one_invalid_image(client, mock_run_vision):
+    """Test 400 for the whole batch when one image is not an image"""
+    mock_run_vision.side_effect = lambda prompt, mission_id, **kwargs: vision_result(mission_id, 1.0)
+
+    response = client.post(
+        "/analyze/batch",
+        data={"prompts": ["first", "second"], "mission_id": "mis_001"},
+        files=[
+            ("images", ("good.png", VALID_PNG, "image/png")),
+            ("images", ("bad.bin", b"not an image", "application/octet-stream"))
+        ]
+    )
+
+    assert response.status_code == 400
+    assert "invalid or corrupted" in response.json()["detail"]
+
+
+def test_batch_json_prompt_list_with_one_image(client, mock_run_vision):
+    """Test that a single prompts field holding a JSON array is parsed, even for one image"""
+    mock_run_vision.side_effect = lambda prompt, mission_id, **kwargs: vision_result(mission_id, 1.0)
+
+    response = client.post(
+        "/analyze/batch",
+        data={"prompts": '["detect a stop sign"]', "mission_id": "mis_001"},
+        files=png_uploads(1)
+    )
+
+    assert response.status_code == 200
+    assert mock_run_vision.call_args.kwargs["prompt"] == "detect a stop sign"
+
+
+def test_batch_analyze_path_is_deprecated(client):
+    """Test that the original /batch-analyze path is marked deprecated in the schema"""
+    paths = client.get("/openapi.json").json()["paths"]
+    assert paths["/batch-analyze"]["post"]["deprecated"] is True
+    assert "deprecated" not in paths["/analyze/batch"]["post"]
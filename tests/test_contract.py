@@ -1,71 +1,56 @@
 import pytest
-from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock, patch
-from app.main import app
-from app.schemas import VisionResult, BBox
+from pydantic import TypeAdapter
+from app.schemas import VisionAnalyzeResponse
+from tests.helpers import MULTIPART_HEADERS, VALID_PNG, encode_multipart
 
 
-@pytest.fixture
-def client():
-    return TestClient(app)
+# Built once for the module and reused by every contract check
+VISION_RESPONSE_ADAPTER = TypeAdapter(VisionAnalyzeResponse)
 
-
-@pytest.fixture
-def valid_image():
-    """Create a minimal valid PNG image"""
-    from PIL import Image
-    import io
-    img = Image.new('RGB', (100, 100), color='red')
-    buf = io.BytesIO()
-    img.save(buf, format='PNG')
-    return buf.getvalue()
+# Multipart request bodies, encoded once and reused by the tests that post them
+PNG_UPLOAD = ("test.png", VALID_PNG, "image/png")
+STOP_SIGN_BODY = encode_multipart({"prompt": "detect a stop sign", "mission_id": "mis_001"}, PNG_UPLOAD)
+TEST_PROMPT_BODY = encode_multipart({"prompt": "test", "mission_id": "mis_001"}, PNG_UPLOAD)
+NO_PROMPT_BODY = encode_multipart({"mission_id": "mis_001"}, PNG_UPLOAD)
 
 
 @pytest.mark.asyncio
-async def test_analyze_success(client, valid_image):
+async def test_analyze_success(aclient, mock_run_vision):
     """Test successful analysis with valid input"""
     mock_result = {
-        "found": True,
-        "confidence": 0.87,
-        "boxes": [
-            {"x": 0.12, "y": 0.34, "w": 0.22, "h": 0.19, "confidence": 0.83}
-        ]
+        "use_case": "OBJECT_NOT_FOUND",
+        "mission_id": "mis_001",
+        "priority": 3,
+        "drone_location_at_snapshot": {"lat": 12.34, "lon": -67.89, "alt_agl_ft": 100.0}
     }
     
-    with patch("app.main.run_vision", new_callable=AsyncMock) as mock_run:
-        mock_run.return_value = mock_result
-        
-        response = client.post(
-            "/analyze",
-            data={"prompt": "detect a stop sign"},
-            files={"image": ("test.png", valid_image, "image/png")}
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["found"] is True
-        assert data["confidence"] == 0.87
-        assert len(data["boxes"]) == 1
-        # Validate with Pydantic
-        VisionResult.model_validate(data)
+    mock_run_vision.return_value = mock_result
+    
+    response = await aclient.post("/analyze", content=STOP_SIGN_BODY, headers=MULTIPART_HEADERS)
+    
+    assert response.status_code == 200
+    # Parse and validate the wire bytes against the response contract in one pass
+    result = VISION_RESPONSE_ADAPTER.validate_json(response.content).vision_result
+    assert result.use_case == "OBJECT_NOT_FOUND"
+    assert result.mission_id == "mis_001"
+    assert result.drone_location_at_snapshot.alt_agl_ft == 100.0
 
 
 def test_analyze_missing_image(client):
     """Test 400 when image is missing"""
     response = client.post(
         "/analyze",
-        data={"prompt": "test"}
+        data={"prompt": "test", "mission_id": "mis_001"}
     )
     assert response.status_code == 400
+    assert "Image is required" in response.json()["detail"]
 
 
-def test_analyze_missing_prompt(client, valid_image):
+def test_analyze_missing_prompt(client):
     """Test 400 when prompt is missing"""
-    response = client.post(
-        "/analyze",
-        files={"image": ("test.png", valid_image, "image/png")}
-    )
-    assert response.status_code == 422  # FastAPI validation error
+    response = client.post("/analyze", content=NO_PROMPT_BODY, headers=MULTIPART_HEADERS)
+    assert response.status_code == 400  # Validation errors are returned as 400
+    assert "Prompt is required" in response.json()["detail"]
 
 
 def test_analyze_invalid_image(client):
@@ -73,44 +58,32 @@ def test_analyze_invalid_image(client):
     invalid_image = b"not an image"
     response = client.post(
         "/analyze",
-        data={"prompt": "test"},
-        files={"image": ("test.txt", invalid_image, "text/plain")}
+        data={"prompt": "test", "mission_id": "mis_001"},
+        files={"image": ("test.bin", invalid_image, "application/octet-stream")}
     )
     assert response.status_code == 400
-    assert "invalid image" in response.json()["detail"]
+    assert "invalid or corrupted" in response.json()["detail"]
 
 
 @pytest.mark.asyncio
-async def test_analyze_invalid_output(client, valid_image):
+async def test_analyze_invalid_output(aclient, mock_run_vision):
     """Test 500 when run_vision returns invalid output"""
     invalid_result = {"found": True}  # Missing required fields
     
-    with patch("app.main.run_vision", new_callable=AsyncMock) as mock_run:
-        mock_run.return_value = invalid_result
-        
-        response = client.post(
-            "/analyze",
-            data={"prompt": "test"},
-            files={"image": ("test.png", valid_image, "image/png")}
-        )
-        
-        assert response.status_code == 500
+    mock_run_vision.return_value = invalid_result
+    
+    response = await aclient.post("/analyze", content=TEST_PROMPT_BODY, headers=MULTIPART_HEADERS)
+    
+    assert response.status_code == 500
 
 
 @pytest.mark.asyncio
-async def test_analyze_no_final_output(client, valid_image):
+async def test_analyze_no_final_output(aclient, mock_run_vision):
     """Test 500 when agent doesn't return final_output"""
-    from app.agent_def import run_vision
+    mock_run_vision.side_effect = RuntimeError("Agent result is undefined")
+    
+    response = await aclient.post("/analyze", content=TEST_PROMPT_BODY, headers=MULTIPART_HEADERS)
     
-    with patch("app.main.run_vision", new_callable=AsyncMock) as mock_run:
-        mock_run.side_effect = RuntimeError("Agent result is undefined")
-        
-        response = client.post(
-            "/analyze",
-            data={"prompt": "test"},
-            files={"image": ("test.png", valid_image, "image/png")}
-        )
-        
-        assert response.status_code == 500
+    assert response.status_code == 500
 
 
@@ -0,0 +1,127 @@
+from contextlib import nullcontext
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.utils import image_digest
+from app.workflows import (
+    UPLOADED_IMAGE_IDS,
+    WorkflowInput,
+    prepare_image_input,
+    run_vision,
+    run_workflow,
+)
+from tests.helpers import MULTIPART_HEADERS, VALID_PNG, encode_multipart
+
+
+@pytest.fixture
+def openai_client():
+    """Stub the shared OpenAI client; files.create returns file-abc"""
+    client = MagicMock()
+    client.files.create = AsyncMock(return_value=SimpleNamespace(id="file-abc"))
+    UPLOADED_IMAGE_IDS.clear()
+    with patch("app.workflows.get_openai_client", return_value=client):
+        yield client
+    UPLOADED_IMAGE_IDS.clear()
+
+
+@pytest.mark.asyncio
+async def test_small_image_is_inlined(openai_client):
+    """Test that an image up to IMAGE_FILE_REF_THRESHOLD becomes a data URL without an upload"""
+    data_url, file_id = await prepare_image_input(VALID_PNG, "test.png", "image/png")
+
+    assert data_url.startswith("data:image/png;base64,")
+    assert file_id is None
+    openai_client.files.create.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_large_image_is_uploaded(openai_client, monkeypatch):
+    """Test that an image above IMAGE_FILE_REF_THRESHOLD is uploaded and passed by file ID"""
+    monkeypatch.setattr("app.workflows.IMAGE_FILE_REF_THRESHOLD", len(VALID_PNG) - 1)
+
+    data_url, file_id = await prepare_image_input(VALID_PNG, "test.png", "image/png")
+
+    assert (data_url, file_id) == (None, "file-abc")
+    openai_client.files.create.assert_awaited_once()
+    assert openai_client.files.create.await_args.kwargs["purpose"] == "vision"
+
+
+@pytest.mark.asyncio
+async def test_same_image_reuses_file_id(openai_client, monkeypatch):
+    """Test that uploading the same bytes again hits the file ID cache"""
+    monkeypatch.setattr("app.workflows.IMAGE_FILE_REF_THRESHOLD", len(VALID_PNG) - 1)
+
+    first = await prepare_image_input(VALID_PNG, "test.png", "image/png")
+    second = await prepare_image_input(VALID_PNG, "again.png", "image/png")
+
+    assert first == second == (None, "file-abc")
+    openai_client.files.create.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_given_digest_is_not_recomputed(openai_client, monkeypatch):
+    """Test that a digest passed by the caller keys the cache without hashing the image again"""
+    monkeypatch.setattr("app.workflows.IMAGE_FILE_REF_THRESHOLD", len(VALID_PNG) - 1)
+    digest = image_digest(VALID_PNG)
+
+    with patch("app.workflows.image_digest") as mock_digest:
+        await prepare_image_input(VALID_PNG, "test.png", "image/png", digest)
+
+    mock_digest.assert_not_called()
+    assert UPLOADED_IMAGE_IDS[digest] == "file-abc"
+
+
+@pytest.mark.asyncio
+async def test_run_vision_sends_file_id():
+    """Test that run_vision references an uploaded image by input_image.file_id"""
+    output = SimpleNamespace(
+        use_case="OBJECT_NOT_FOUND",
+        mission_id="mis_001",
+        priority=3,
+        drone_location_at_snapshot=SimpleNamespace(lat=12.34, lon=-67.89, alt_agl_ft=100.0)
+    )
+    with patch("app.workflows.Runner.run", new_callable=AsyncMock, return_value=SimpleNamespace(final_output=output)) as mock_run:
+        await run_vision(prompt="detect a stop sign", image_data_url=None, mission_id="mis_001", image_file_id="file-abc")
+
+    image_item = mock_run.await_args.kwargs["input"][0]["content"][1]
+    assert image_item == {"type": "input_image", "file_id": "file-abc", "detail": "auto"}
+
+
+@pytest.mark.asyncio
+async def test_run_workflow_sends_file_id():
+    """Test that the SARA chat workflow references an uploaded image by input_image.file_id"""
+    sara_result = SimpleNamespace(
+        final_output=SimpleNamespace(status="NEEDS_INFO", messageForConsole=None),
+        new_items=[]
+    )
+    formatter_result = SimpleNamespace(final_output_as=lambda _: "Which mission?", new_items=[])
+
+    with patch("app.workflows.trace", return_value=nullcontext()), \
+            patch("app.workflows.Runner.run", new_callable=AsyncMock, side_effect=[sara_result, formatter_result]) as mock_run:
+        await run_workflow(WorkflowInput(input_as_text="what is this?"), image_file_id="file-abc")
+
+    sara_input = mock_run.await_args_list[0].kwargs["input"]
+    assert {"type": "input_image", "file_id": "file-abc", "detail": "auto"} in sara_input[0]["content"]
+
+
+@pytest.mark.asyncio
+async def test_analyze_hashes_large_image_once(aclient, mock_run_vision, openai_client, monkeypatch):
+    """Test that /analyze reuses the cache key's digest for the file upload"""
+    monkeypatch.setattr("app.workflows.IMAGE_FILE_REF_THRESHOLD", len(VALID_PNG) - 1)
+    mock_run_vision.return_value = {
+        "use_case": "OBJECT_NOT_FOUND",
+        "mission_id": "mis_001",
+        "priority": 3,
+        "drone_location_at_snapshot": {"lat": 12.34, "lon": -67.89, "alt_agl_ft": 100.0}
+    }
+    body = encode_multipart({"prompt": "detect a stop sign", "mission_id": "mis_001"}, ("test.png", VALID_PNG, "image/png"))
+
+    with patch("app.main.image_digest", side_effect=image_digest) as main_digest, \
+            patch("app.workflows.image_digest", side_effect=image_digest) as upload_digest:
+        response = await aclient.post("/analyze", content=body, headers=MULTIPART_HEADERS)
+
+    assert response.status_code == 200
+    assert mock_run_vision.await_args.kwargs["image_file_id"] == "file-abc"
+    assert main_digest.call_count + upload_digest.call_count == 1
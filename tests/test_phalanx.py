@@ -0,0 +1,73 @@
+from unittest.mock import patch
+
+import httpx
+import orjson
+import pytest
+
+from app.workflows import create_mission_in_phalanx
+
+
+TASKS = [{"type": "MOVE_TO", "alt_agl_ft": 60.0, "duration_s": 0}]
+
+
+async def post_mission(planner_output: dict) -> tuple:
+    """Run create_mission_in_phalanx against a stub Phalanx API; returns (result, sent body)"""
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(orjson.loads(request.content))
+        return httpx.Response(200, json={"data": "mis_123"})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        with patch("app.workflows.PHALANX_API_URL", "http://phalanx.test/api"), \
+                patch("app.workflows.get_http_client", return_value=http_client):
+            result = await create_mission_in_phalanx(planner_output)
+    return result, sent[0] if sent else None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("priority, expected", [
+    (0, 1),
+    (-2, 1),
+    (2.6, 3),
+    (9, 5),
+    ("4", 4),
+    (None, 3),
+    ("high", 3),
+])
+async def test_priority_is_clamped(priority, expected):
+    """Test that the planner priority is rounded and clamped to 1-5, with 3 for unusable values"""
+    result, body = await post_mission({"priority": priority, "tasks": TASKS})
+
+    assert result == ("mis_123", "")
+    assert body["priority"] == expected
+
+
+@pytest.mark.asyncio
+async def test_missing_priority_defaults_to_3():
+    """Test that a plan without a priority is sent with priority 3"""
+    _, body = await post_mission({"tasks": TASKS})
+
+    assert body["priority"] == 3
+
+
+@pytest.mark.asyncio
+async def test_task_types_are_mapped_to_phalanx_types():
+    """Test that planner task types are mapped to the LOITER/PATROL/ORBIT types Phalanx accepts"""
+    planner_tasks = [
+        {"type": task_type, "alt_agl_ft": 80.0, "duration_s": 60}
+        for task_type in ("MOVE_TO", "VISION_WAYPOINT", "loiter", "PATROL", "ORBIT", "SURVEY")
+    ]
+
+    _, body = await post_mission({"priority": 2, "tasks": planner_tasks})
+
+    assert [task["type"] for task in body["tasks"]] == ["LOITER", "LOITER", "LOITER", "PATROL", "ORBIT", "LOITER"]
+
+
+@pytest.mark.asyncio
+async def test_no_tasks_skips_the_request():
+    """Test that a plan without tasks is not sent to Phalanx"""
+    result, body = await post_mission({"priority": 2, "tasks": []})
+
+    assert result == (None, "No valid tasks found in planner output")
+    assert body is None
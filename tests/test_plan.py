@@ -0,0 +1,80 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+APPEND_TASK_BODY = {
+    "use_case": "APPEND_TASK",
+    "mission_id": "mis_001",
+    "priority": 3,
+    "drone_location": {"lat": 12.34, "lon": -67.89, "alt_agl_ft": 100.0},
+    "waypoint": {"lat": 12.35, "lon": -67.88, "alt_agl_ft": 80.0, "fusion_status": "safe"},
+    "time_of_execution_s": 120
+}
+
+MISSION_PLAN = {
+    "mission_id": "mis_001",
+    "priority": 3,
+    "tasks": [
+        {"type": "MOVE_TO", "lat": 12.35, "lon": -67.88, "alt_agl_ft": 80.0, "duration_s": 0, "speed_mps": 3.0},
+        {"type": "VISION_WAYPOINT", "lat": 12.35, "lon": -67.88, "alt_agl_ft": 80.0, "duration_s": 60, "speed_mps": 0.5}
+    ]
+}
+
+
+@pytest.fixture
+def mock_run_planner():
+    """Patch the planner workflow; returns MISSION_PLAN unless a test overrides it"""
+    with patch("app.main.run_planner", new_callable=AsyncMock, return_value=MISSION_PLAN) as mock_run:
+        yield mock_run
+
+
+def test_plan_valid_body(client, mock_run_planner):
+    """Test that a schema-valid body is forwarded to the planner as sent"""
+    response = client.post("/plan", json=APPEND_TASK_BODY)
+
+    assert response.status_code == 200
+    assert response.json() == MISSION_PLAN
+    mock_run_planner.assert_awaited_once_with(APPEND_TASK_BODY)
+
+
+def test_plan_coercible_body_is_forwarded_coerced(client, mock_run_planner):
+    """Test that a body pydantic accepts in lax mode (priority "3") is forwarded with the coerced value"""
+    response = client.post("/plan", json={**APPEND_TASK_BODY, "priority": "3"})
+
+    assert response.status_code == 200
+    forwarded = mock_run_planner.await_args.args[0]
+    assert forwarded["priority"] == 3
+    assert forwarded["waypoint"]["fusion_status"] == "safe"
+
+
+def test_plan_invalid_body(client, mock_run_planner):
+    """Test 400 with field-level messages when the body matches neither request type"""
+    response = client.post("/plan", json={**APPEND_TASK_BODY, "priority": 9})
+
+    assert response.status_code == 400
+    assert "body.AppendTaskRequest.priority" in response.json()["detail"]
+    mock_run_planner.assert_not_called()
+
+
+def test_plan_missing_mission_id_names_the_nested_field(client, mock_run_planner):
+    """Test that a missing nested mission_id is reported per field, not as the /analyze form message"""
+    body = {key: value for key, value in APPEND_TASK_BODY.items() if key != "mission_id"}
+    response = client.post("/plan", json=body)
+
+    assert response.status_code == 400
+    assert "Field 'body.AppendTaskRequest.mission_id' is required" in response.json()["detail"]
+    assert "Mission ID is required" not in response.json()["detail"]
+
+
+def test_plan_unknown_keys_are_not_forwarded(client, mock_run_planner):
+    """Test that keys outside the request schema, top-level or nested, never reach the planner"""
+    body = {
+        **APPEND_TASK_BODY,
+        "extra": "INJECT",
+        "waypoint": {**APPEND_TASK_BODY["waypoint"], "note": "INJECT"}
+    }
+    response = client.post("/plan", json=body)
+
+    assert response.status_code == 200
+    mock_run_planner.assert_awaited_once_with(APPEND_TASK_BODY)
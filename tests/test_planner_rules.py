@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.agents.planner import PlannerSchema, apply_task_rules
+from app.workflows import run_planner
+
+
+def agent_plan(alt_agl_ft: float = 40.0, follow_up_type: str = "VISION_WAYPOINT") -> PlannerSchema:
+    """A planner output as the agent might return it, with rough speeds and durations"""
+    return PlannerSchema.model_validate({
+        "priority": 2,
+        "additionalData": {},
+        "tasks": [
+            {"type": "MOVE_TO", "lat": 12.35, "lon": -67.88, "alt_agl_ft": alt_agl_ft, "duration_s": 5, "speed_mps": 10},
+            {"type": follow_up_type, "lat": 12.35, "lon": -67.88, "alt_agl_ft": alt_agl_ft, "duration_s": 5, "speed_mps": 10}
+        ]
+    })
+
+
+def task_values(plan: PlannerSchema) -> list:
+    return [(task.type, task.alt_agl_ft, task.duration_s, task.speed_mps) for task in plan.tasks]
+
+
+@pytest.mark.parametrize("fusion_status", ["safe", None])
+def test_move_to_then_vision_waypoint(fusion_status):
+    """Test MOVE_TO at least 60 ft followed by VISION_WAYPOINT when the waypoint is safe or has no status"""
+    plan = apply_task_rules(agent_plan(alt_agl_ft=40.0), fusion_status)
+
+    assert task_values(plan) == [
+        ("MOVE_TO", 60.0, 0, 3.0),
+        ("VISION_WAYPOINT", 60.0, 60, 0.5)
+    ]
+
+
+@pytest.mark.parametrize("fusion_status", ["nosafe", "NOSAFE", " NoSafe "])
+def test_move_to_then_loiter_when_nosafe(fusion_status):
+    """Test LOITER 20 ft above the MOVE_TO altitude when the waypoint is nosafe, in any case"""
+    plan = apply_task_rules(agent_plan(alt_agl_ft=100.0), fusion_status)
+
+    assert task_values(plan) == [
+        ("MOVE_TO", 100.0, 0, 3.0),
+        ("LOITER", 120.0, 90, 0)
+    ]
+
+
+def test_follow_up_type_ignores_the_agent():
+    """Test that the agent's follow-up type does not override the waypoint's fusion_status"""
+    plan = apply_task_rules(agent_plan(follow_up_type="LOITER"), "safe")
+
+    assert plan.tasks[1].type == "VISION_WAYPOINT"
+
+
+def test_error_plan_is_unchanged():
+    """Test that an error-mode plan without tasks is returned as is"""
+    plan = PlannerSchema.model_validate({"priority": 0, "additionalData": {}, "tasks": []})
+
+    assert apply_task_rules(plan, "nosafe").tasks == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fusion_status, follow_up_type", [("nosafe", "LOITER"), ("safe", "VISION_WAYPOINT")])
+async def test_run_planner_uses_waypoint_fusion_status(fusion_status, follow_up_type):
+    """Test that run_planner picks the follow-up task from the APPEND_TASK waypoint"""
+    validator_result = SimpleNamespace(final_output=SimpleNamespace(status="OK", errors=[]), new_items=[])
+    planner_result = SimpleNamespace(final_output=agent_plan(follow_up_type="VISION_WAYPOINT"))
+    request = {
+        "use_case": "APPEND_TASK",
+        "mission_id": "mis_001",
+        "priority": 2,
+        "waypoint": {"lat": 12.35, "lon": -67.88, "alt_agl_ft": 80.0, "fusion_status": fusion_status}
+    }
+
+    with patch("app.workflows.Runner.run", new_callable=AsyncMock, side_effect=[validator_result, planner_result]):
+        plan = await run_planner(request)
+
+    assert plan["tasks"][1]["type"] == follow_up_type
@@ -0,0 +1,119 @@
+import asyncio
+import gc
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.main import guess_planner_request, run_analysis
+from tests.helpers import VALID_PNG
+
+
+PROMPT = "Confirm the red car. lat: 12.34, lon: -67.89, alt: 100, priority 5"
+
+MISSION_PLAN = {
+    "mission_id": "mis_001",
+    "priority": 5,
+    "tasks": [
+        {"type": "MOVE_TO", "lat": 12.34, "lon": -67.89, "alt_agl_ft": 100.0, "duration_s": 0, "speed_mps": 3.0},
+        {"type": "VISION_WAYPOINT", "lat": 12.34, "lon": -67.89, "alt_agl_ft": 100.0, "duration_s": 60, "speed_mps": 0.5}
+    ]
+}
+
+
+def vision_output(use_case: str = "OBJECT_CONFIRMED", lat: float = 12.34) -> dict:
+    return {
+        "use_case": use_case,
+        "mission_id": "mis_001",
+        "priority": 5,
+        "drone_location_at_snapshot": {"lat": lat, "lon": -67.89, "alt_agl_ft": 100.0}
+    }
+
+
+def slow_vision(output: dict):
+    """A run_vision stand-in that yields to the loop, so the speculative plan gets to run first"""
+    async def run(**kwargs):
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return output
+    return run
+
+
+@pytest.fixture(autouse=True)
+def speculative_planner(monkeypatch):
+    monkeypatch.setattr("app.main.SPECULATIVE_PLANNER", True)
+
+
+def test_guess_planner_request_from_prompt():
+    """Test that a prompt with lat, lon, alt and priority maps to the OBJECT_CONFIRMED request"""
+    assert guess_planner_request(PROMPT, "mis_001") == {
+        "use_case": "OBJECT_CONFIRMED",
+        "mission_id": "mis_001",
+        "priority": "high",
+        "drone_location_at_snapshot": {"lat": 12.34, "lon": -67.89, "alt_agl_ft": 100.0}
+    }
+
+
+@pytest.mark.parametrize("prompt", [
+    "Confirm the red car",
+    "Confirm the red car. lat: 12.34, lon: -67.89",
+    "Confirm the red car. lon: -67.89, alt: 100",
+])
+def test_guess_planner_request_needs_full_location(prompt):
+    """Test None when the prompt lacks lat, lon or altitude"""
+    assert guess_planner_request(prompt, "mis_001") is None
+
+
+@pytest.mark.asyncio
+async def test_matching_vision_result_reuses_speculative_plan():
+    """Test that a confirmed result at the guessed location/priority uses the speculative plan"""
+    with patch("app.main.run_vision", side_effect=slow_vision(vision_output())), \
+            patch("app.main.run_planner", new_callable=AsyncMock, return_value=MISSION_PLAN) as mock_run_planner:
+        response = await run_analysis(PROMPT, "mis_001", VALID_PNG, "test.png", "image/png")
+
+    assert response.mission_plan.model_dump() == MISSION_PLAN
+    mock_run_planner.assert_awaited_once_with(guess_planner_request(PROMPT, "mis_001"))
+
+
+@pytest.mark.asyncio
+async def test_mismatched_vision_result_cancels_speculative_plan():
+    """Test that a confirmed result elsewhere cancels the speculative plan and plans again"""
+    speculative_request = guess_planner_request(PROMPT, "mis_001")
+    speculative_cancelled = asyncio.Event()
+
+    async def planner(request):
+        if request == speculative_request:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                speculative_cancelled.set()
+                raise
+        return MISSION_PLAN
+
+    with patch("app.main.run_vision", side_effect=slow_vision(vision_output(lat=50.0))), \
+            patch("app.main.run_planner", side_effect=planner) as mock_run_planner:
+        response = await run_analysis(PROMPT, "mis_001", VALID_PNG, "test.png", "image/png")
+        await asyncio.sleep(0)  # let the cancellation reach the speculative task
+
+    assert response.mission_plan is not None
+    assert mock_run_planner.await_count == 2
+    assert mock_run_planner.await_args.args[0]["drone_location_at_snapshot"]["lat"] == 50.0
+    assert speculative_cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_failed_speculative_plan_is_retrieved():
+    """Test that an unused speculative plan that failed does not log 'exception was never retrieved'"""
+    loop = asyncio.get_running_loop()
+    unhandled = []
+    loop.set_exception_handler(lambda _, context: unhandled.append(context))
+    try:
+        with patch("app.main.run_vision", side_effect=slow_vision(vision_output("OBJECT_NOT_FOUND"))), \
+                patch("app.main.run_planner", new_callable=AsyncMock, side_effect=RuntimeError("planner down")) as mock_run_planner:
+            response = await run_analysis(PROMPT, "mis_001", VALID_PNG, "test.png", "image/png")
+        gc.collect()  # the unretrieved-exception report is made when the task is collected
+    finally:
+        loop.set_exception_handler(None)
+
+    assert response.mission_plan is None
+    mock_run_planner.assert_awaited_once()
+    assert unhandled == []
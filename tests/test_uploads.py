@@ -0,0 +1,97 @@
+import io
+import struct
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from app.images import detect_image_mime, read_image
+from tests.helpers import VALID_PNG
+
+
+def test_analyze_oversize_image(client, mock_run_vision, monkeypatch):
+    """Test 413 when the image is larger than MAX_IMAGE_BYTES"""
+    monkeypatch.setattr("app.images.MAX_IMAGE_BYTES", len(VALID_PNG) - 1)
+
+    response = client.post(
+        "/analyze",
+        data={"prompt": "test", "mission_id": "mis_001"},
+        files={"image": ("test.png", VALID_PNG, "image/png")}
+    )
+
+    assert response.status_code == 413
+    mock_run_vision.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_read_image_stops_at_limit_without_size(monkeypatch):
+    """Test that an upload of unknown size is rejected once the chunks read exceed the limit"""
+    monkeypatch.setattr("app.images.MAX_IMAGE_BYTES", 16)
+    monkeypatch.setattr("app.images.UPLOAD_CHUNK_SIZE", 8)
+    upload = UploadFile(io.BytesIO(VALID_PNG), filename="test.png")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await read_image(upload)
+
+    assert exc_info.value.status_code == 413
+    assert upload.file.tell() == 24  # three chunks, not the whole file
+
+
+def test_analyze_rejects_non_image_type_before_reading(client, mock_run_vision):
+    """Test 400 for a text/plain upload, without reading the upload"""
+    with patch("app.main.read_image") as mock_read_image:
+        response = client.post(
+            "/analyze",
+            data={"prompt": "test", "mission_id": "mis_001"},
+            files={"image": ("notes.txt", b"hello", "text/plain")}
+        )
+
+    assert response.status_code == 400
+    assert "Unsupported file type 'text/plain'" in response.json()["detail"]
+    mock_read_image.assert_not_called()
+    mock_run_vision.assert_not_called()
+
+
+# 1x1 ICO: one directory entry wrapping VALID_PNG; no signature sniff, so Pillow identifies it
+VALID_ICO = (
+    struct.pack("<HHH", 0, 1, 1)
+    + struct.pack("<BBBBHHII", 1, 1, 0, 0, 0, 32, len(VALID_PNG), 22)
+    + VALID_PNG
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content_type", ["application/octet-stream", "image/png", None])
+async def test_detect_image_mime_prefers_pillow_format(content_type):
+    """Test that the format Pillow reads wins over a generic or wrong declared type"""
+    headers = Headers({"content-type": content_type}) if content_type else None
+    upload = UploadFile(io.BytesIO(VALID_ICO), filename="upload.bin", headers=headers)
+
+    assert await detect_image_mime(VALID_ICO, upload) == "image/x-icon"
+
+
+def test_analyze_rejects_text_starting_with_bm(client, mock_run_vision):
+    """Test that an octet-stream upload starting with "BM" is not taken for a BMP"""
+    response = client.post(
+        "/analyze",
+        data={"prompt": "test", "mission_id": "mis_001"},
+        files={"image": ("notes.bin", b"BMW 3 series, rental notes", "application/octet-stream")}
+    )
+
+    assert response.status_code == 400
+    assert "invalid or corrupted" in response.json()["detail"]
+    mock_run_vision.assert_not_called()
+
+
+@pytest.mark.parametrize("path, fields, expected", [
+    ("/analyze", {"prompt": "test", "mission_id": "mis_001", "image": "not-a-file"}, "Image is required"),
+    ("/analyze/batch", {"prompts": "test", "mission_id": "mis_001", "images": "not-a-file"}, "Images are required"),
+])
+def test_text_value_for_upload_field(client, mock_run_vision, path, fields, expected):
+    """Test that a text value sent in place of the image upload reads as a missing image"""
+    response = client.post(path, data=fields)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == expected
+    mock_run_vision.assert_not_called()
@@ -0,0 +1,29 @@
+import struct
+
+import pytest
+
+from app.utils import sniff_mime
+from tests.helpers import VALID_PNG
+
+
+@pytest.mark.parametrize("header, expected", [
+    (VALID_PNG, "image/png"),
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF\x00", "image/jpeg"),
+    (b"GIF87a\x01\x00\x01\x00", "image/gif"),
+    (b"GIF89a\x01\x00\x01\x00", "image/gif"),
+    (b"II*\x00\x08\x00\x00\x00", "image/tiff"),
+    (b"MM\x00*\x00\x00\x00\x08", "image/tiff"),
+    (b"RIFF\x24\x00\x00\x00WEBPVP8 ", "image/webp"),
+    # BITMAPINFOHEADER and BITMAPCOREHEADER BMPs
+    (b"BM" + struct.pack("<IHHII", 58, 0, 0, 54, 40), "image/bmp"),
+    (b"BM" + struct.pack("<IHHII", 32, 0, 0, 26, 12), "image/bmp"),
+    # Misses: text starting with "BM", non-zero BMP reserved bytes, other RIFF containers
+    (b"BMW 3 series, rental notes", None),
+    (b"BM" + struct.pack("<IHHII", 58, 1, 0, 54, 40), None),
+    (b"RIFF\x24\x00\x00\x00WAVEfmt ", None),
+    (b"not an image at all", None),
+    (b"", None),
+])
+def test_sniff_mime(header, expected):
+    """Test the signature table, WebP, the BMP header check and misses"""
+    assert sniff_mime(header[:18]) == expected
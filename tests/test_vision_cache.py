@@ -0,0 +1,87 @@
+import asyncio
+import io
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from app.main import analyze_one
+from app.schemas import VisionAnalyzeResponse
+from tests.helpers import MULTIPART_HEADERS, VALID_PNG, encode_multipart
+
+
+STOP_SIGN_BODY = encode_multipart(
+    {"prompt": "detect a stop sign", "mission_id": "mis_001"},
+    ("test.png", VALID_PNG, "image/png")
+)
+
+VISION_OUTPUT = {
+    "use_case": "OBJECT_NOT_FOUND",
+    "mission_id": "mis_001",
+    "priority": 3,
+    "drone_location_at_snapshot": {"lat": 12.34, "lon": -67.89, "alt_agl_ft": 100.0}
+}
+
+
+@pytest.mark.asyncio
+async def test_repeated_request_runs_vision_once(aclient, mock_run_vision):
+    """Test that an identical retry is answered from the cache without a second agent run"""
+    mock_run_vision.return_value = VISION_OUTPUT
+
+    first = await aclient.post("/analyze", content=STOP_SIGN_BODY, headers=MULTIPART_HEADERS)
+    second = await aclient.post("/analyze", content=STOP_SIGN_BODY, headers=MULTIPART_HEADERS)
+
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    mock_run_vision.assert_awaited_once()
+
+
+def png_upload() -> UploadFile:
+    return UploadFile(io.BytesIO(VALID_PNG), filename="test.png", headers=Headers({"content-type": "image/png"}))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_run():
+    """Test that identical requests arriving while the first is running wait for its result"""
+    release = asyncio.Event()
+    response = VisionAnalyzeResponse(vision_result=VISION_OUTPUT)
+
+    async def slow_analysis(*args, **kwargs):
+        await release.wait()
+        return response
+
+    with patch("app.main.run_analysis", side_effect=slow_analysis) as run_analysis:
+        tasks = [
+            asyncio.create_task(analyze_one("detect a stop sign", "mis_001", VALID_PNG, png_upload()))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)  # every task reaches the in-flight check before the run ends
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+    assert run_analysis.await_count == 1
+    assert all(result is response for result in results)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_a_failure():
+    """Test that a failed run reaches every request waiting on it"""
+    release = asyncio.Event()
+    error = HTTPException(status_code=500, detail="Vision agent failed")
+
+    async def failing_analysis(*args, **kwargs):
+        await release.wait()
+        raise error
+
+    with patch("app.main.run_analysis", side_effect=failing_analysis) as run_analysis:
+        tasks = [
+            asyncio.create_task(analyze_one("detect a stop sign", "mis_001", VALID_PNG, png_upload()))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert run_analysis.await_count == 1
+    assert all(result is error for result in results)